@@ -0,0 +1,114 @@
+"""
+Конкурентная отправка комментариев с настройками dev и prod.
+
+Запуск из каталога ya_news:
+
+    python -m benchmarks.comments [--threads 8] [--posts 50]
+
+Для каждого слоя настроек (DJANGO_ENV) в отдельном процессе создаётся
+чистая база во временном каталоге, и --threads потоков отправляют по
+--posts комментариев через весь стек Django: сессия, пользователь,
+форма, вставка. С dev каждый запрос открывает новое соединение, а
+запись блокирует базу целиком; с prod соединения переиспользуются
+(CONN_MAX_AGE), а журнал WAL и synchronous=NORMAL удешевляют запись.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+ENVS = ('dev', 'prod')
+
+
+def post_comments(url, user, posts):
+    from django.db import connection
+    from django.test import Client
+
+    client = Client()
+    client.force_login(user)
+    failed = 0
+    for index in range(posts):
+        try:
+            response = client.post(url, {'text': f'Комментарий {index}'})
+            failed += response.status_code != 302
+        except Exception:
+            failed += 1
+    connection.close()
+    return failed
+
+
+def run(threads, posts, database):
+    """Замер в текущем процессе; печатает строку с результатом."""
+    import django
+    from django.conf import settings
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
+    django.setup()
+    # Соединения создаются лениво, так что база ещё не открыта.
+    settings.DATABASES['default']['NAME'] = database
+    settings.ALLOWED_HOSTS = ['testserver']
+    # С DEBUG каждый запрос ещё и запоминается; сравниваем только базу.
+    settings.DEBUG = False
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.urls import reverse
+
+    from news.models import Comment, News
+
+    call_command('migrate', verbosity=0)
+    news = News.objects.create(title='Новость', text='Текст')
+    users = [
+        get_user_model().objects.create(username=f'user{index}')
+        for index in range(threads)
+    ]
+    url = reverse('news:detail', args=(news.pk,))
+    start = perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        failed = sum(pool.map(
+            lambda user: post_comments(url, user, posts), users
+        ))
+    elapsed = perf_counter() - start
+    saved = Comment.objects.count()
+    print(f'{saved / elapsed:.1f} {failed}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--posts', type=int, default=50)
+    parser.add_argument('--database', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.database:
+        return run(args.threads, args.posts, args.database)
+
+    results = {}
+    with TemporaryDirectory() as directory:
+        for env in ENVS:
+            output = subprocess.run(
+                [
+                    sys.executable, '-m', 'benchmarks.comments',
+                    '--threads', str(args.threads),
+                    '--posts', str(args.posts),
+                    '--database', str(Path(directory) / f'{env}.sqlite3'),
+                ],
+                env={
+                    **os.environ,
+                    'DJANGO_ENV': env,
+                    'DJANGO_SECRET_KEY': 'benchmark',
+                },
+                capture_output=True,
+                check=True,
+                text=True,
+            ).stdout.split()
+            results[env] = float(output[-2]), int(output[-1])
+    for env, (rate, failed) in results.items():
+        print(f'{env:>5}: {rate:8.1f} комментариев/с, ошибок: {failed}')
+    print(f'Прирост: {results["prod"][0] / results["dev"][0]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
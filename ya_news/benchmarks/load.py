@@ -0,0 +1,113 @@
+"""
+Нагрузка на страницы под WSGI и ASGI с медленными клиентами.
+
+Сервер скрипт не запускает: поднимите проект под нужным сервером и
+направьте на него нагрузку, например из каталога ya_news:
+
+    gunicorn yanews.wsgi --threads 8 -b 127.0.0.1:8000
+    python -m benchmarks.load http://127.0.0.1:8000/ --clients 200
+
+    uvicorn yanews.asgi:application --port 8001
+    python -m benchmarks.load http://127.0.0.1:8001/ --clients 200
+
+Медленный клиент отправляет запрос по частям в течение --slow секунд,
+как телефон на плохой сети. Задержка считается от последнего
+отправленного байта до конца ответа. Для страниц YaNote, которые
+требуют входа, передайте --cookie sessionid=....
+"""
+import argparse
+import asyncio
+from time import perf_counter
+from urllib.parse import urlsplit
+
+CHUNKS = 10
+
+
+def request_bytes(url, cookie):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += f'?{parts.query}'
+    headers = [
+        f'GET {path} HTTP/1.1',
+        f'Host: {parts.netloc}',
+        'Connection: close',
+    ]
+    if cookie:
+        headers.append(f'Cookie: {cookie}')
+    return ('\r\n'.join(headers) + '\r\n\r\n').encode()
+
+
+async def fetch(host, port, data, slow):
+    """Один запрос; возвращает задержку в секундах и код ответа."""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        step = -(-len(data) // CHUNKS)
+        for start in range(0, len(data), step):
+            if start:
+                await asyncio.sleep(slow / CHUNKS)
+            writer.write(data[start:start + step])
+            await writer.drain()
+        sent = perf_counter()
+        response = await reader.read()
+        status = int(response.split(b' ', 2)[1])
+        return perf_counter() - sent, status
+    finally:
+        writer.close()
+
+
+async def client(host, port, data, slow, deadline, results):
+    while perf_counter() < deadline:
+        try:
+            results.append(await fetch(host, port, data, slow))
+        except (OSError, ValueError, IndexError):
+            results.append((None, None))
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+async def run(args):
+    parts = urlsplit(args.url)
+    data = request_bytes(args.url, args.cookie)
+    results = []
+    start = perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(
+        client(parts.hostname, parts.port or 80, data, args.slow, deadline,
+               results)
+        for _ in range(args.clients)
+    ))
+    elapsed = perf_counter() - start
+    latencies = sorted(
+        latency for latency, status in results if status == 200
+    )
+    errors = len(results) - len(latencies)
+    print(f'Запросов: {len(results)}, ошибок: {errors}')
+    if latencies:
+        print(f'Запросов в секунду: {len(latencies) / elapsed:.1f}')
+        for name, share in (('p50', 0.5), ('p99', 0.99)):
+            print(f'{name}: {percentile(latencies, share) * 1000:.1f} мс')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument('url')
+    parser.add_argument('--clients', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument(
+        '--slow',
+        type=float,
+        default=0.5,
+        help='За сколько секунд клиент отправляет запрос.',
+    )
+    parser.add_argument('--cookie')
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+Сравнение фильтра запрещённых слов с прежней проверкой в цикле.
+
+Запуск из каталога ya_news:
+
+    python -m benchmarks.moderation [--words 5000] [--length 20000]
+"""
+import argparse
+from random import Random
+from timeit import timeit
+
+from news.moderation import WordFilter
+
+LETTERS = 'абвгдежзийклмнопрстуфхцчшщыэюя'
+
+
+def naive_search(words, text):
+    """Прежняя проверка из CommentForm.clean_text."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+def random_word(rng):
+    return ''.join(rng.choices(LETTERS, k=rng.randint(5, 12)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--words', type=int, default=5_000)
+    parser.add_argument('--length', type=int, default=20_000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    rng = Random(0)
+    words = [random_word(rng) for _ in range(args.words)]
+    text = ''
+    while len(text) < args.length:
+        text += random_word(rng) + ' '
+    word_filter = WordFilter(words)
+
+    for name, search in (
+        ('цикл по словам', lambda: naive_search(words, text)),
+        ('скомпилированный фильтр', lambda: word_filter.search(text)),
+    ):
+        seconds = timeit(search, number=args.repeat) / args.repeat
+        print(f'{name:>24}: {seconds * 1000:8.2f} мс на комментарий')
+    compile_seconds = timeit(lambda: WordFilter(words), number=1)
+    print(f'{"компиляция списка":>24}: {compile_seconds * 1000:8.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
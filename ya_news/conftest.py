@@ -8,16 +8,25 @@ from django.utils import timezone
 from django.test import Client
 from django.urls import reverse
 
+from news.cache import page_cache
 from news.forms import BAD_WORDS
 from news.models import News, Comment
 
 
+pytest_plugins = ('perf_budgets',)
+
 User = get_user_model()
 
 NEWS_BASE_URL = 'news:'
 USERS_BASE_URL = 'users:'
 
 
+@pytest.fixture(autouse=True)
+def clear_page_cache():
+    """Страницы из кеша не должны переходить из теста в тест."""
+    page_cache().clear()
+
+
 @pytest.fixture
 def author():
     return User.objects.get_or_create(username='author')[0]
@@ -104,6 +113,20 @@ def many_comments(news, author):
         comment.save()
 
 
+@pytest.fixture
+def scaled_news(scale, news, author):
+    """scale новостей и scale комментариев к новости news."""
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости')
+        for index in range(scale - 1)
+    )
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Комментарий {index}')
+        for index in range(scale)
+    )
+    return news
+
+
 @pytest.fixture
 def users_login_url():
     return reverse(f'{USERS_BASE_URL}login')
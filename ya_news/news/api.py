@@ -0,0 +1,247 @@
+"""
+JSON API новостей и комментариев.
+
+Параметр ?fields=id,title перечисляет нужные поля ответа; из базы
+читаются только соответствующие им столбцы, а автор комментария
+присоединяется, только если запрошен. Комментарии создаются и
+меняются через CommentForm с теми же правилами, что и на страницах:
+новый или изменённый комментарий уходит на модерацию, менять и
+удалять можно только свои.
+
+Ошибки - те же исключения Django, что и у страниц, только ответ на них
+в JSON {"errors": {поле: [сообщения]}}: ValidationError и BadRequest -
+400, PermissionDenied - 403, Http404 - 404.
+
+Приложения входят по ключу из команды issue_api_token в заголовке
+Authorization: Token <ключ>; CSRF для таких запросов не проверяется,
+ведь браузер сам этот заголовок не отправит. Запросы с сессией
+браузера, как и формы, должны нести заголовок X-CSRFToken со значением
+cookie csrftoken.
+"""
+import json
+
+from django.conf import settings
+from django.core.exceptions import (
+    BadRequest, PermissionDenied, ValidationError
+)
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.decorators import method_decorator
+from django.views import generic
+from django.views.decorators.csrf import csrf_exempt
+
+from .forms import CommentForm
+from .models import ApiToken, Comment, News
+from .pagination import encode_cursor, page_queryset
+from .views import CommentBase
+
+# Поле ответа и выражение, по которому оно читается из базы.
+NEWS_FIELDS = {
+    'id': 'pk',
+    'title': 'title',
+    'text': 'text',
+    'date': 'date',
+    'comment_count': 'comment_count',
+    'last_comment_at': 'last_comment_at',
+    'updated': 'updated',
+}
+COMMENT_FIELDS = {
+    'id': 'pk',
+    'news': 'news_id',
+    'author': 'author__username',
+    'text': 'text',
+    'status': 'status',
+    'created': 'created',
+    'updated': 'updated',
+}
+NEWS_LIST_FIELDS = ('id', 'title', 'date', 'comment_count')
+TOKEN_SCHEME = 'Token'
+
+
+def requested_fields(request, columns, default=None):
+    """Поля из ?fields=; без параметра - default или все."""
+    value = request.GET.get('fields')
+    if not value:
+        return tuple(default or columns)
+    fields = tuple(dict.fromkeys(
+        field.strip() for field in value.split(',') if field.strip()
+    ))
+    unknown = [field for field in fields if field not in columns]
+    if unknown or not fields:
+        raise ValidationError({'fields': [
+            f'Допустимые поля: {", ".join(columns)}.'
+        ]})
+    return fields
+
+
+def select(queryset, fields, columns):
+    """Строки запроса словарями только с полями fields."""
+    return [
+        dict(zip(fields, row))
+        for row in queryset.values_list(*(columns[name] for name in fields))
+    ]
+
+
+def errors(status, messages):
+    return JsonResponse({'errors': messages}, status=status)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ApiMixin:
+    """
+    Вход по ключу или по сессии и ошибки в JSON.
+
+    Стоит первым среди базовых классов, чтобы перехватывать и отказ
+    LoginRequiredMixin.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            if not self.authenticate(request):
+                return self.handle_no_permission()
+            return super().dispatch(request, *args, **kwargs)
+        except ValidationError as error:
+            return errors(400, error.message_dict)
+        except BadRequest as error:
+            return errors(400, {'__all__': [str(error)]})
+        except PermissionDenied as error:
+            return errors(403, {'__all__': [str(error)]})
+        except Http404 as error:
+            return errors(404, {'__all__': [str(error)]})
+
+    @staticmethod
+    def authenticate(request):
+        """
+        Пользователь по ключу из Authorization; без заголовка - сессия,
+        для которой изменяющий запрос проходит проверку CSRF.
+        """
+        header = request.headers.get('Authorization')
+        if header is None:
+            if CsrfViewMiddleware(lambda request: None).process_view(
+                request, None, (), {}
+            ) is not None:
+                raise PermissionDenied(
+                    'Нет CSRF-токена: передайте X-CSRFToken или войдите '
+                    'по ключу.'
+                )
+            return True
+        scheme, _, key = header.partition(' ')
+        user = None
+        if scheme == TOKEN_SCHEME:
+            user = ApiToken.objects.user_for(key)
+        if user is None:
+            return False
+        request.user = user
+        return True
+
+    def handle_no_permission(self):
+        return errors(401, {'__all__': ['Нужно войти в систему.']})
+
+    def payload(self):
+        try:
+            data = json.loads(self.request.body)
+        except ValueError as error:
+            raise BadRequest(f'Некорректный JSON: {error}')
+        if not isinstance(data, dict):
+            raise BadRequest('Ожидается объект JSON.')
+        return data
+
+    def comment_response(self, comment, status):
+        fields = requested_fields(self.request, COMMENT_FIELDS)
+        return JsonResponse(
+            select(Comment.objects.filter(pk=comment.pk), fields,
+                   COMMENT_FIELDS)[0],
+            status=status
+        )
+
+
+class NewsListApi(ApiMixin, generic.View):
+    """Последние новости, как на главной странице."""
+
+    def get(self, request, *args, **kwargs):
+        fields = requested_fields(request, NEWS_FIELDS, NEWS_LIST_FIELDS)
+        news = News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return JsonResponse(
+            {'results': select(news, fields, NEWS_FIELDS)}
+        )
+
+
+class NewsDetailApi(ApiMixin, generic.View):
+
+    def get(self, request, *args, **kwargs):
+        fields = requested_fields(request, NEWS_FIELDS)
+        rows = select(
+            News.objects.filter(pk=kwargs['pk']), fields, NEWS_FIELDS
+        )
+        if not rows:
+            raise Http404('Новость не найдена.')
+        return JsonResponse(rows[0])
+
+
+class NewsCommentsApi(ApiMixin, generic.View):
+    """
+    Комментарии новости страницами по (created, id) и новый комментарий.
+
+    Курсор следующей страницы - в поле next, передаётся в ?after=.
+    """
+
+    def get_news(self):
+        news = News.objects.filter(pk=self.kwargs['pk']).only('pk').first()
+        if news is None:
+            raise Http404('Новость не найдена.')
+        return news
+
+    def get(self, request, *args, **kwargs):
+        fields = requested_fields(request, COMMENT_FIELDS)
+        size = settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+        comments = self.get_news().comment_set.visible_to(request.user)
+        # created и id нужны для курсора, даже если их не запросили.
+        page = list(page_queryset(
+            comments.values_list(
+                'created', 'pk', *(COMMENT_FIELDS[name] for name in fields)
+            ),
+            request.GET.get('after'),
+            size
+        ))
+        next_cursor = None
+        if len(page) > size:
+            next_cursor = encode_cursor(*page[size - 1][:2])
+        return JsonResponse({
+            'results': [dict(zip(fields, row[2:])) for row in page[:size]],
+            'next': next_cursor,
+        })
+
+    def post(self, request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        form = CommentForm(data=self.payload())
+        if not form.is_valid():
+            raise ValidationError(form.errors)
+        comment = form.save(commit=False)
+        comment.news = self.get_news()
+        comment.author = request.user
+        comment.status = Comment.Status.PENDING
+        comment.save()
+        return self.comment_response(comment, status=201)
+
+
+class CommentApi(ApiMixin, CommentBase, generic.View):
+    """Изменение и удаление своего комментария."""
+    http_method_names = ('patch', 'delete')
+
+    def get_object(self):
+        comment = self.get_queryset().filter(pk=self.kwargs['pk']).first()
+        if comment is None:
+            raise Http404('Комментарий не найден.')
+        return comment
+
+    def patch(self, request, *args, **kwargs):
+        form = CommentForm(data=self.payload(), instance=self.get_object())
+        if not form.is_valid():
+            raise ValidationError(form.errors)
+        form.instance.status = Comment.Status.PENDING
+        return self.comment_response(form.save(), status=200)
+
+    def delete(self, request, *args, **kwargs):
+        self.get_object().delete()
+        return HttpResponse(status=204)
@@ -0,0 +1,89 @@
+"""
+Асинхронные лента, страница новости и поток событий комментариев.
+
+Под ASGI Django выполняет синхронные представления в одном общем
+потоке (thread_sensitive=True), и медленные запросы встают в очередь
+друг за другом. Здесь то же представление целиком, вместе с отрисовкой
+шаблона и ленивыми запросами в нём, выполняется в пуле потоков с
+thread_sensitive=False: запросы к базе идут параллельно, а цикл
+событий занят только приёмом запросов и отдачей ответов.
+
+Варианты подключаются в urls.py, только если сервер запущен с
+переменной окружения ASYNC_VIEWS=1.
+"""
+import asyncio
+from time import monotonic
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+
+from . import events, views
+from .models import News
+
+
+def in_thread(function):
+    """Синхронная функция в пуле потоков со своими соединениями."""
+    def call(*args, **kwargs):
+        try:
+            return function(*args, **kwargs)
+        finally:
+            # Соединения с базой в пуле живут по потокам; закрываем
+            # их так же, как обработчик запроса закрывает свои.
+            close_old_connections()
+
+    return sync_to_async(call, thread_sensitive=False)
+
+
+def async_view(view_class):
+    """Асинхронная обёртка над синхронным CBV."""
+    view = view_class.as_view()
+
+    def respond(request, *args, **kwargs):
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+
+    respond = in_thread(respond)
+
+    async def wrapper(request, *args, **kwargs):
+        return await respond(request, *args, **kwargs)
+
+    wrapper.view_class = view_class
+    return wrapper
+
+
+def events_start(request, pk):
+    if not News.objects.filter(pk=pk).exists():
+        raise Http404('Новость не найдена.')
+    return events.start_id(request, pk)
+
+
+async def news_events(request, pk):
+    """
+    Поток событий для ASGI.
+
+    Django 3.2 читает потоковый ответ синхронно прямо в цикле событий,
+    поэтому здесь соединение держится, пока не появятся события (или
+    COMMENT_EVENTS_STREAM_SECONDS), и закрывается после первой пачки.
+    Ожидание не занимает поток, а браузер сам переподключается с
+    Last-Event-ID через RETRY_MS.
+    """
+    after = await in_thread(events_start)(request, pk)
+    deadline = monotonic() + settings.COMMENT_EVENTS_STREAM_SECONDS
+    while True:
+        messages, after = await in_thread(events.read)(request, pk, after)
+        if messages or monotonic() >= deadline:
+            break
+        await asyncio.sleep(settings.COMMENT_EVENTS_POLL)
+    response = HttpResponse(
+        events.body(messages, after), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+news_list = async_view(views.NewsList)
+news_detail = async_view(views.NewsDetailView)
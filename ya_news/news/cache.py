@@ -0,0 +1,64 @@
+"""
+Кеш отрисованных страниц новостей.
+
+Ключ страницы содержит номер версии, который меняется после каждой
+зафиксированной правки новостей или комментариев. Старые записи просто
+перестают читаться и со временем вытесняются самим кешем.
+
+Лента новостей (feeds.py) не зависит от комментариев, поэтому у неё
+своя версия, которую меняют только правки самих новостей.
+
+Версия хранится в том же кеше, поэтому для нескольких процессов нужен
+общий бэкенд (например, файловый), а не локальная память процесса.
+"""
+from functools import partial
+from time import time_ns
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+VERSION_KEY = 'news:version'
+FEED_VERSION_KEY = 'news:feed-version'
+
+
+def page_cache():
+    return caches[settings.PAGE_CACHE_ALIAS]
+
+
+def get_version(key=VERSION_KEY):
+    version = page_cache().get(key)
+    if version is None:
+        page_cache().add(key, time_ns(), timeout=None)
+        version = page_cache().get(key)
+    return version
+
+
+def bump_version(key=VERSION_KEY):
+    try:
+        page_cache().incr(key)
+    except ValueError:
+        # Версия вытеснена: начинаем с числа, которого точно не было.
+        page_cache().set(key, time_ns(), timeout=None)
+
+
+def invalidate(using=None, feed=False):
+    """
+    Сменить версию, когда правка станет видна другим запросам.
+
+    feed - правка меняет и ленту: новость добавлена, удалена или у неё
+    изменились заголовок, текст или дата.
+    """
+    transaction.on_commit(bump_version, using=using)
+    if feed:
+        transaction.on_commit(
+            partial(bump_version, FEED_VERSION_KEY), using=using
+        )
+
+
+def page_key(name):
+    return f'news:page:{name}:{get_version()}'
+
+
+def feed_key(name):
+    return f'news:feed:{name}:{get_version(FEED_VERSION_KEY)}'
@@ -0,0 +1,96 @@
+"""
+Поток изменений комментариев новости (server-sent events).
+
+Источник - таблица CommentEvent: модели комментариев пишут в неё
+строку при каждом сохранении и удалении, так что события дают и
+страницы, и API, и фоновая модерация. Поток отправляет только
+изменения: для сохранённого комментария - его разметку (событие
+comment), для удалённого или ставшего невидимым - только id (событие
+remove). Видимость проверяется в момент отправки, как на странице:
+комментарий на модерации получает только его автор.
+
+id события - курсор: браузер возвращает его в заголовке Last-Event-ID
+при переподключении. Первое подключение начинается с момента
+отрисовки страницы (?since= с меткой времени), а без неё - с
+последнего события.
+
+Каждый ответ - одна пачка событий, после которой браузер
+переподключается сам. Под ASGI ответ ждёт событий в цикле событий
+(async_views.news_events), под WSGI отвечает сразу: ожидание заняло бы
+поток сервера, и десяток открытых страниц остановил бы сайт.
+"""
+import json
+from datetime import datetime, timezone
+
+from django.template.loader import render_to_string
+
+from .models import Comment, CommentEvent
+
+# Через сколько миллисекунд браузер переподключается под ASGI.
+RETRY_MS = 1000
+
+
+def message(event, event_id, data):
+    return (
+        f'id: {event_id}\nevent: {event}\n'
+        f'data: {json.dumps(data, ensure_ascii=False)}\n\n'
+    )
+
+
+def keepalive(event_id):
+    """Пустое сообщение: только сдвигает курсор браузера."""
+    return f'id: {event_id}\n\n'
+
+
+def start_id(request, news_id):
+    """id события, после которого начинается поток."""
+    events = CommentEvent.objects.filter(news_id=news_id).order_by('-pk')
+    last_id = request.headers.get('Last-Event-ID', '')
+    if last_id.isdigit():
+        return int(last_id)
+    since = request.GET.get('since', '')
+    if since.isdigit():
+        events = events.filter(created__lt=datetime.fromtimestamp(
+            int(since), timezone.utc
+        ))
+    return events.values_list('pk', flat=True).first() or 0
+
+
+def read(request, news_id, after):
+    """Сообщения о событиях после after и id последнего из них."""
+    events = list(CommentEvent.objects.filter(
+        news_id=news_id, pk__gt=after
+    ).order_by('pk').values_list('pk', 'comment_id', 'kind'))
+    if not events:
+        return '', after
+    # Из нескольких событий одного комментария важно только последнее.
+    latest = {comment_id: (pk, kind) for pk, comment_id, kind in events}
+    visible = Comment.objects.visible_to(request.user).filter(
+        news_id=news_id,
+        pk__in=[
+            comment_id for comment_id, (_, kind) in latest.items()
+            if kind == CommentEvent.Kind.SAVED
+        ]
+    ).select_related('author').in_bulk()
+    messages = []
+    for comment_id, (pk, _) in sorted(
+        latest.items(), key=lambda item: item[1][0]
+    ):
+        comment = visible.get(comment_id)
+        if comment is None:
+            messages.append(message('remove', pk, {'id': comment_id}))
+            continue
+        messages.append(message('comment', pk, {
+            'id': comment_id,
+            'html': render_to_string(
+                'news/includes/comments.html',
+                {'comments': [comment]},
+                request=request
+            ),
+        }))
+    return ''.join(messages), events[-1][0]
+
+
+def body(messages, after, retry_ms=RETRY_MS):
+    """Ответ целиком; без событий - keepalive с тем же курсором."""
+    return f'retry: {retry_ms}\n\n{messages or keepalive(after)}'
@@ -0,0 +1,78 @@
+"""
+RSS и Atom лента последних новостей.
+
+Новости те же и в том же порядке, что на главной. Отрисованная лента
+хранится в кеше страниц вместе со временем отрисовки до первой правки
+новостей (cache.feed_key), так что запрос читателя - это чтение из
+кеша без запросов к базе. Время отрисовки служит Last-Modified, и на
+If-Modified-Since отвечаем 304 без тела.
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.syndication.views import Feed
+from django.http import HttpResponse
+from django.urls import reverse, reverse_lazy
+from django.utils import timezone
+from django.utils.feedgenerator import Atom1Feed
+from django.views.decorators.http import condition
+
+from .cache import feed_key, page_cache
+from .models import News
+
+
+class NewsFeed(Feed):
+    title = 'YaNews'
+    link = reverse_lazy('news:home')
+    description = 'Последние новости'
+
+    def items(self):
+        return News.objects.only(
+            'pk', 'title', 'text', 'date'
+        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+
+    def item_title(self, item):
+        return item.title
+
+    def item_description(self, item):
+        return item.text
+
+    def item_link(self, item):
+        return reverse('news:detail', args=(item.pk,))
+
+    def item_pubdate(self, item):
+        return timezone.make_aware(datetime.combine(item.date, time.min))
+
+    def __call__(self, request, *args, **kwargs):
+        return cached_feed(self, request)
+
+
+class AtomNewsFeed(NewsFeed):
+    feed_type = Atom1Feed
+    subtitle = NewsFeed.description
+
+
+def feed_entry(feed, request):
+    """Тело, тип и время отрисовки ленты; при промахе лента рисуется."""
+    if not hasattr(request, '_feed_entry'):
+        key = feed_key(feed.feed_type.__name__)
+        entry = page_cache().get(key)
+        if entry is None:
+            response = Feed.__call__(feed, request)
+            entry = (
+                response.content,
+                response['Content-Type'],
+                timezone.now().replace(microsecond=0),
+            )
+            page_cache().set(key, entry)
+        request._feed_entry = entry
+    return request._feed_entry
+
+
+def cached_feed(feed, request):
+    @condition(last_modified_func=lambda request: feed_entry(feed, request)[2])
+    def view(request):
+        content, content_type, _ = feed_entry(feed, request)
+        return HttpResponse(content, content_type=content_type)
+
+    return view(request)
@@ -0,0 +1,20 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import ApiToken
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выдаёт пользователю ключ JSON API и печатает его один раз.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+
+    def handle(self, *args, username, **options):
+        try:
+            user = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        self.stdout.write(ApiToken.objects.issue(user))
@@ -0,0 +1,53 @@
+from time import sleep
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError
+
+from news.models import CommentEvent
+from news.pipeline import BATCH_SIZE, load_rules, moderate_batch
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет комментарии, ожидающие модерации, и публикует или '
+        'отклоняет их пачками. Когда очередь пуста, удаляет старые '
+        'события потока комментариев.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Пауза в секундах, когда очередь пуста.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разобрать очередь и выйти.',
+        )
+
+    def handle(self, *args, batch_size, interval, once, **options):
+        rules = load_rules()
+        try:
+            while True:
+                try:
+                    published, rejected = moderate_batch(batch_size, rules)
+                except OperationalError as error:
+                    # Например, database is locked: пачка не изменилась,
+                    # её заберёт следующая попытка.
+                    self.stderr.write(f'Пачка не обработана: {error}')
+                    sleep(interval)
+                    continue
+                if published or rejected:
+                    self.stdout.write(
+                        f'Опубликовано: {published}, отклонено: {rejected}'
+                    )
+                    continue
+                CommentEvent.objects.prune()
+                if once:
+                    return
+                sleep(interval)
+        except KeyboardInterrupt:
+            self.stdout.write('Остановлено.')
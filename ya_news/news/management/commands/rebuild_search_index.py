@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from news import search
+
+
+class Command(BaseCommand):
+    help = 'Заново строит поисковый индекс новостей и комментариев.'
+
+    def handle(self, *args, **options):
+        if not search.search_enabled():
+            self.stdout.write(
+                'Без FTS5 поиск идёт по таблицам, индекс не нужен.'
+            )
+            return
+        search.rebuild()
+        self.stdout.write(self.style.SUCCESS('Готово.'))
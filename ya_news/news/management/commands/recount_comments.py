@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счётчик комментариев и дату последнего комментария '
+        'у новостей. Работает пачками, чтобы не держать долгих блокировок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько новостей пересчитывать в одной транзакции.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        last_pk = 0
+        total = 0
+        while True:
+            batch = list(
+                News.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                    'pk', flat=True
+                )[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                News.objects.filter(pk__in=batch).refresh_comment_stats()
+            last_pk = batch[-1]
+            total += len(batch)
+            self.stdout.write(f'Пересчитано новостей: {total}')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
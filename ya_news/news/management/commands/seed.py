@@ -0,0 +1,198 @@
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from functools import partial
+from multiprocessing import Pool
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from news.models import Comment, News
+
+User = get_user_model()
+
+WORDS = (
+    'новость', 'город', 'погода', 'спорт', 'выборы', 'наука', 'кино',
+    'музыка', 'дорога', 'театр', 'школа', 'рынок', 'парк', 'река', 'лес',
+)
+START_DATE = date(2020, 1, 1)
+START_TIME = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def batch_rng(seed, kind, batch):
+    """
+    Своя последовательность случайных чисел для каждой пачки.
+
+    Поэтому результат не зависит от числа процессов и порядка их работы.
+    """
+    return Random(f'{seed}:{kind}:{batch}')
+
+
+def sentence(rng, length):
+    return ' '.join(rng.choices(WORDS, k=length)).capitalize()
+
+
+def news_rows(seed, total, batch_size, batch):
+    rng = batch_rng(seed, 'news', batch)
+    return [
+        (
+            sentence(rng, 4)[:50],
+            sentence(rng, rng.randint(20, 80)),
+            START_DATE + timedelta(days=index * 3650 // total),
+        )
+        for index in range(
+            batch * batch_size, min((batch + 1) * batch_size, total)
+        )
+    ]
+
+
+def comment_rows(seed, total, news_count, user_count, batch_size, batch):
+    """
+    Комментарии идут подряд по новостям, поэтому пачка затрагивает
+    немного новостей. Квадрат в распределении даёт первым новостям
+    гораздо больше комментариев, как у самых обсуждаемых историй.
+    """
+    rng = batch_rng(seed, 'comments', batch)
+    return [
+        (
+            int(news_count * (index / total) ** 2),
+            rng.randrange(user_count),
+            sentence(rng, rng.randint(3, 30)),
+            START_TIME + timedelta(seconds=index),
+        )
+        for index in range(
+            batch * batch_size, min((batch + 1) * batch_size, total)
+        )
+    ]
+
+
+@contextmanager
+def manual_created():
+    """bulk_create иначе перезапишет created текущим временем."""
+    field = Comment._meta.get_field('created')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        'Детерминированно наполняет базу пользователями, новостями и '
+        'комментариями для нагрузочных проверок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--news', type=int, default=10_000)
+        parser.add_argument('--comments', type=int, default=1_000_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Процессы, генерирующие строки; вставляет всегда основной.',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Префикс имён пользователей, чтобы запускать повторно.',
+        )
+
+    def handle(self, *args, **options):
+        if options['comments'] and not (options['news'] and options['users']):
+            raise CommandError(
+                'Для комментариев нужны хотя бы одна новость и один автор.'
+            )
+        self.options = options
+        self.pool = None
+        if options['workers'] > 1:
+            self.pool = Pool(options['workers'])
+        try:
+            user_ids = self.seed_users()
+            news_ids = self.seed_news()
+            self.seed_comments(news_ids, user_ids)
+        finally:
+            if self.pool:
+                self.pool.close()
+                self.pool.join()
+        self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    def batches(self, func, total):
+        count = -(-total // self.options['batch_size'])
+        if self.pool:
+            return self.pool.imap(func, range(count))
+        return map(func, range(count))
+
+    def seed_users(self):
+        prefix, total = self.options['prefix'], self.options['users']
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(
+                f'Пользователи с префиксом «{prefix}» уже есть, '
+                'для повторного запуска укажите другой --prefix.'
+            )
+        password = make_password('password', salt=prefix)
+        last_pk = User.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        User.objects.bulk_create(
+            (
+                User(username=f'{prefix}-{index}', password=password)
+                for index in range(total)
+            ),
+            batch_size=self.options['batch_size'],
+        )
+        self.stdout.write(f'Пользователей: {total}')
+        return list(
+            User.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def seed_news(self):
+        total = self.options['news']
+        last_pk = News.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        rows = partial(
+            news_rows, self.options['seed'], total, self.options['batch_size']
+        )
+        for batch in self.batches(rows, total):
+            News.objects.bulk_create(
+                News(title=title, text=text, date=news_date)
+                for title, text, news_date in batch
+            )
+        self.stdout.write(f'Новостей: {total}')
+        return list(
+            News.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def seed_comments(self, news_ids, user_ids):
+        total = self.options['comments']
+        rows = partial(
+            comment_rows,
+            self.options['seed'],
+            total,
+            len(news_ids),
+            len(user_ids),
+            self.options['batch_size'],
+        )
+        done = 0
+        with manual_created():
+            for batch in self.batches(rows, total):
+                Comment.objects.bulk_create((
+                    Comment(
+                        news_id=news_ids[news],
+                        author_id=user_ids[user],
+                        text=text,
+                        created=created,
+                    )
+                    for news, user, text, created in batch
+                ), record_events=False)
+                done += len(batch)
+                self.stdout.write(f'Комментариев: {done}/{total}')
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:11
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def fill_comment_stats(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    comments = Comment.objects.filter(news=OuterRef('pk')).order_by()
+    News.objects.using(schema_editor.connection.alias).update(
+        comment_count=Coalesce(
+            Subquery(
+                comments.values('news').annotate(
+                    total=Count('pk')
+                ).values('total')
+            ),
+            0
+        ),
+        last_comment_at=Subquery(
+            comments.order_by('-created').values('created')[:1]
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний комментарий'),
+        ),
+        migrations.RunPython(fill_comment_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:40
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Последнее изменение новости или её комментариев', verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='status',
+            field=models.CharField(choices=[('pending', 'На модерации'), ('published', 'Опубликован'), ('rejected', 'Отклонён')], default='published', max_length=10, verbose_name='Статус'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['status', 'id'], name='comment_status_idx'),
+        ),
+    ]
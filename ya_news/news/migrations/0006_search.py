@@ -0,0 +1,59 @@
+from django.db import migrations
+
+# Копия схемы из news.search на момент миграции: дальнейшие правки
+# модуля не должны менять то, что делает миграция.
+NEWS_TABLE = 'news_news_fts'
+COMMENT_TABLE = 'news_comment_fts'
+OPTIONS = "tokenize='unicode61 remove_diacritics 2', prefix='2 3'"
+
+
+def folded(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def uses_fts(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    # Без FTS5 поиск идёт по самим таблицам, и индекс не нужен.
+    if not uses_fts(schema_editor.connection):
+        return
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {NEWS_TABLE} '
+        f'USING fts5(title, text, {OPTIONS})'
+    )
+    schema_editor.execute(
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {COMMENT_TABLE} '
+        f'USING fts5(news_id UNINDEXED, text, {OPTIONS})'
+    )
+    schema_editor.execute(
+        f'INSERT INTO {NEWS_TABLE} (rowid, title, text) '
+        f'SELECT id, {folded("title")}, {folded("text")} FROM news_news'
+    )
+    schema_editor.execute(
+        f'INSERT INTO {COMMENT_TABLE} (rowid, news_id, text) '
+        f'SELECT id, news_id, {folded("text")} FROM news_comment '
+        "WHERE status = 'published'"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for table in (NEWS_TABLE, COMMENT_TABLE):
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_comment_status'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
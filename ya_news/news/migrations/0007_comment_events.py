@@ -0,0 +1,28 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('comment_id', models.BigIntegerField()),
+                ('kind', models.CharField(choices=[('saved', 'Сохранён'), ('deleted', 'Удалён')], max_length=10)),
+                ('created', models.DateTimeField(auto_now_add=True, db_index=True)),
+                ('news', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='news.news')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='commentevent',
+            index=models.Index(fields=['news', 'id'], name='commentevent_news_id_idx'),
+        ),
+    ]
@@ -1,24 +1,259 @@
-from datetime import datetime
+import secrets
+from datetime import datetime, timedelta
+from hashlib import sha256
 
 from django.conf import settings
-from django.db import models
+from django.core.cache import cache
+from django.db import models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import search
+from .cache import invalidate
+
+
+def last_pk(queryset):
+    return queryset.model.objects.using(queryset.db).order_by(
+        '-pk'
+    ).values_list('pk', flat=True).first() or 0
+
+
+def created_rows(queryset, objs, previous_pk):
+    """
+    Записи, созданные bulk_create.
+
+    SQLite не возвращает их id, поэтому они читаются заново как всё,
+    что новее previous_pk.
+    """
+    if all(obj.pk for obj in objs):
+        return objs
+    return queryset.model.objects.using(queryset.db).filter(
+        pk__gt=previous_pk
+    ).iterator()
+
+
+class NewsQuerySet(models.QuerySet):
+    """
+    Любое изменение новостей сбрасывает кеш страниц, а изменение
+    заголовка или текста ещё и обновляет поисковый индекс. Кеш ленты
+    сбрасывают только изменения полей, которые в ней видны.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            previous_pk = last_pk(self)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            search.index_news(created_rows(self, objs, previous_pk), self.db)
+        invalidate(self.db, feed=True)
+        return objs
+
+    def update(self, **kwargs):
+        if not {'title', 'text'} & kwargs.keys():
+            rows = super().update(**kwargs)
+            invalidate(self.db, feed='date' in kwargs)
+            return rows
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            search.index_news(
+                News.objects.using(self.db).filter(pk__in=ids).iterator(),
+                self.db
+            )
+        invalidate(self.db, feed=True)
+        return rows
+
+    def delete(self):
+        result = super().delete()
+        invalidate(self.db, feed=True)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def refresh_comment_stats(self):
+        """Пересчитывает счётчик и дату последнего комментария с нуля."""
+        comments = Comment.objects.published().filter(
+            news=OuterRef('pk')
+        ).order_by()
+        return self.update(
+            updated=timezone.now(),
+            comment_count=Coalesce(
+                Subquery(
+                    comments.values('news').annotate(
+                        total=Count('pk')
+                    ).values('total')
+                ),
+                0
+            ),
+            last_comment_at=Subquery(
+                comments.order_by('-created').values('created')[:1]
+            ),
+        )
+
+    def shift_comment_count(self, delta):
+        """Сдвигает счётчик на delta и обновляет дату последнего."""
+        return self.update(
+            updated=timezone.now(),
+            comment_count=F('comment_count') + delta,
+            last_comment_at=Subquery(
+                Comment.objects.published().filter(
+                    news=OuterRef('pk')
+                ).order_by('-created').values('created')[:1]
+            ),
+        )
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    comment_count = models.PositiveIntegerField(
+        'Комментариев',
+        default=0,
+        editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        'Последний комментарий',
+        null=True,
+        blank=True,
+        editable=False
+    )
+    updated = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+        help_text='Последнее изменение новости или её комментариев'
+    )
+
+    objects = NewsQuerySet.as_manager()
 
     class Meta:
         ordering = ('-date',)
+        indexes = (
+            models.Index(fields=('-date', 'id'), name='news_date_id_idx'),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        invalidate(self._state.db, feed=True)
+
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        invalidate(self._state.db, feed=True)
+        return result
+
+
+class CommentQuerySet(models.QuerySet):
+    """
+    Массовые операции с комментариями.
+
+    Сигналы и Comment.save() при них не вызываются, поэтому статистика
+    затронутых новостей, поисковый индекс и поток событий обновляются
+    здесь же, в той же транзакции.
+    """
+
+    def published(self):
+        return self.filter(status=Comment.Status.PUBLISHED)
+
+    def visible_to(self, user):
+        """Опубликованные и собственные ожидающие проверки."""
+        if not user.is_authenticated:
+            return self.published()
+        return self.filter(
+            Q(status=Comment.Status.PUBLISHED)
+            | Q(status=Comment.Status.PENDING, author=user)
+        )
+
+    def _rows(self):
+        """Пары (id комментария, id новости)."""
+        return list(self.values_list('pk', 'news_id'))
+
+    def _refresh_news(self, news_ids):
+        News.objects.using(self.db).filter(
+            pk__in=news_ids
+        ).refresh_comment_stats()
+
+    def bulk_create(self, objs, *args, record_events=True, **kwargs):
+        """
+        record_events=False не пишет событий для открытых страниц:
+        массовой загрузке, как в seed, они не нужны.
+        """
+        with transaction.atomic(using=self.db):
+            previous_pk = last_pk(self)
+            objs = super().bulk_create(objs, *args, **kwargs)
+            self._refresh_news({comment.news_id for comment in objs})
+            created = list(created_rows(self, objs, previous_pk))
+            search.index_comments(created, self.db)
+            if not record_events:
+                return objs
+            # Комментарии на модерации в поток не попадают, пока их
+            # не опубликуют, как и в save().
+            CommentEvent.objects.using(self.db).record(
+                CommentEvent.Kind.SAVED,
+                [
+                    (comment.pk, comment.news_id) for comment in created
+                    if comment.is_published
+                ]
+            )
+        return objs
+
+    def update(self, **kwargs):
+        kwargs.setdefault('updated', timezone.now())
+        with transaction.atomic(using=self.db):
+            before = self._rows()
+            ids = [pk for pk, _ in before]
+            rows = super().update(**kwargs)
+            news_ids = {news_id for _, news_id in before}
+            news = kwargs.get('news', kwargs.get('news_id'))
+            events = CommentEvent.objects.using(self.db)
+            if news is not None:
+                news = getattr(news, 'pk', news)
+                news_ids.add(news)
+                # Перенесённые комментарии пропадают из старой новости.
+                events.record(CommentEvent.Kind.DELETED, before)
+            self._refresh_news(news_ids)
+            if {'text', 'status', 'news', 'news_id'} & kwargs.keys():
+                search.index_comments(
+                    Comment.objects.using(self.db).filter(
+                        pk__in=ids
+                    ).iterator(),
+                    self.db
+                )
+            events.record(
+                CommentEvent.Kind.SAVED,
+                before if news is None else [(pk, news) for pk in ids]
+            )
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            rows = self._rows()
+            result = super().delete()
+            self._refresh_news({news_id for _, news_id in rows})
+            search.unindex(
+                search.COMMENT_TABLE, [pk for pk, _ in rows], self.db
+            )
+            CommentEvent.objects.using(self.db).record(
+                CommentEvent.Kind.DELETED, rows
+            )
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Comment(models.Model):
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'На модерации'
+        PUBLISHED = 'published', 'Опубликован'
+        REJECTED = 'rejected', 'Отклонён'
+
     news = models.ForeignKey(
         News,
         on_delete=models.CASCADE
@@ -29,9 +264,170 @@ class Comment(models.Model):
     )
     text = models.TextField()
     created = models.DateTimeField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=Status.choices,
+        default=Status.PUBLISHED
+    )
+
+    objects = CommentQuerySet.as_manager()
 
     class Meta:
         ordering = ('created',)
+        indexes = (
+            models.Index(
+                fields=('news', 'created', 'id'),
+                name='comment_news_created_idx'
+            ),
+            models.Index(
+                fields=('author', 'created'),
+                name='comment_author_created_idx'
+            ),
+            models.Index(
+                fields=('status', 'id'),
+                name='comment_status_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        comment = super().from_db(db, field_names, values)
+        comment.was_published = comment.is_published
+        return comment
+
+    @property
+    def is_published(self):
+        return self.status == self.Status.PUBLISHED
+
+    def save(self, *args, **kwargs):
+        """
+        Новый комментарий на модерации - это одна вставка: ни счётчики
+        новости, ни поток событий он не меняет, пока его не опубликуют.
+        Автор видит его на странице, куда попадает после отправки.
+        """
+        adding = self._state.adding
+        was_published = not adding and getattr(self, 'was_published', False)
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+            if self.is_published or not adding:
+                News.objects.using(self._state.db).filter(
+                    pk=self.news_id
+                ).shift_comment_count(self.is_published - was_published)
+                CommentEvent.objects.using(self._state.db).record(
+                    CommentEvent.Kind.SAVED, [(self.pk, self.news_id)]
+                )
+        self.was_published = self.is_published
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or self._state.db
+        was_published = getattr(self, 'was_published', self.is_published)
+        pk = self.pk
+        with transaction.atomic(using=using):
+            result = super().delete(*args, **kwargs)
+            News.objects.using(using).filter(
+                pk=self.news_id
+            ).shift_comment_count(-was_published)
+            search.unindex(search.COMMENT_TABLE, [pk], using)
+            CommentEvent.objects.using(using).record(
+                CommentEvent.Kind.DELETED, [(pk, self.news_id)]
+            )
+        return result
+
+
+PRUNE_KEY = 'news:events:pruned'
+
+
+class CommentEventQuerySet(models.QuerySet):
+
+    def record(self, kind, rows):
+        """
+        Записывает события по парам (id комментария, id новости).
+
+        Раз в COMMENT_EVENTS_PRUNE_EVERY секунд заодно удаляет старые
+        события, чтобы таблица не росла и без moderation_worker.
+        """
+        if not rows:
+            return
+        self.bulk_create(
+            CommentEvent(comment_id=pk, news_id=news_id, kind=kind)
+            for pk, news_id in rows
+        )
+        if cache.add(PRUNE_KEY, True, settings.COMMENT_EVENTS_PRUNE_EVERY):
+            self.prune()
+
+    def prune(self):
+        """Удаляет события старше COMMENT_EVENTS_KEEP секунд."""
+        return self.filter(
+            created__lt=timezone.now() - timedelta(
+                seconds=settings.COMMENT_EVENTS_KEEP
+            )
+        ).delete()
+
+
+class CommentEvent(models.Model):
+    """
+    Изменение комментария для потока событий новости, см. events.py.
+
+    Строки пишутся в той же транзакции, что и сам комментарий, поэтому
+    id события монотонно растёт и служит курсором потока. Комментарий
+    хранится без внешнего ключа: после удаления событие остаётся.
+    """
+
+    class Kind(models.TextChoices):
+        SAVED = 'saved', 'Сохранён'
+        DELETED = 'deleted', 'Удалён'
+
+    news = models.ForeignKey(
+        News,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name='+'
+    )
+    comment_id = models.BigIntegerField()
+    kind = models.CharField(max_length=10, choices=Kind.choices)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    objects = CommentEventQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('news', 'id'), name='commentevent_news_id_idx'
+            ),
+        )
+
+
+class ApiTokenQuerySet(models.QuerySet):
+
+    def issue(self, user):
+        """Новый ключ API; в базе остаётся только его SHA-256."""
+        key = secrets.token_urlsafe(32)
+        self.create(user=user, digest=sha256(key.encode()).hexdigest())
+        return key
+
+    def user_for(self, key):
+        """Активный владелец ключа или None."""
+        token = self.filter(
+            digest=sha256(key.encode()).hexdigest()
+        ).select_related('user').first()
+        if token is None or not token.user.is_active:
+            return None
+        return token.user
+
+
+class ApiToken(models.Model):
+    """Ключ JSON API для приложений, см. api.py."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='api_tokens'
+    )
+    digest = models.CharField(max_length=64, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = ApiTokenQuerySet.as_manager()
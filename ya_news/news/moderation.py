@@ -0,0 +1,107 @@
+"""
+Фильтр запрещённых слов для комментариев.
+
+Список слов собирается в префиксное дерево и компилируется в одно
+регулярное выражение по этому дереву. В каждой позиции текста движок
+проходит только по ветке совпавших букв, а не перебирает все слова,
+поэтому проверка почти не зависит от длины списка.
+Выражение ловит типичные уловки: латинские буквы и цифры вместо похожих
+кириллических, повторы букв и разделители между ними («р.е.д.и.с.к.а»).
+Между буквами допускается один знак препинания, но не пробел, иначе
+совпадение переходило бы через границу слов («редис, как»). Слово
+должно начинаться с границы слова, окончание может быть любым.
+"""
+import os
+import re
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+LOOKALIKES = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 't': 'т', 'x': 'х', 'y': 'у', 'ё': 'е',
+    '0': 'о', '3': 'з', '4': 'ч', '6': 'б', '@': 'а',
+})
+SEPARATOR = r'(?:[^\w\s]|_)?'
+
+
+def normalize(text):
+    return text.lower().translate(LOOKALIKES)
+
+
+def build_trie(words):
+    """Дерево букв; слово, продолжающее более короткое, не нужно."""
+    trie = {}
+    for word in sorted(words, key=len):
+        node = trie
+        for letter in word:
+            if node.get(letter) == {}:
+                break
+            node = node.setdefault(letter, {})
+    return trie
+
+
+def trie_pattern(node):
+    """
+    Выражение для поддерева: каждая буква может повторяться и отделяться
+    от следующей одним знаком препинания.
+    """
+    branches = [
+        f'{re.escape(letter)}+'
+        + (f'{SEPARATOR}{trie_pattern(child)}' if child else '')
+        for letter, child in sorted(node.items())
+    ]
+    if len(branches) == 1:
+        return branches[0]
+    return '(?:{})'.format('|'.join(branches))
+
+
+def compile_words(words):
+    words = {normalize(word.strip()) for word in words if word.strip()}
+    if not words:
+        return None
+    return re.compile(
+        r'(?<![^\W_]){}'.format(trie_pattern(build_trie(words)))
+    )
+
+
+def read_words(path):
+    """Одно слово в строке; пустые строки и строки с # пропускаются."""
+    with open(path, encoding='utf-8') as file:
+        return [
+            line.strip() for line in file
+            if line.strip() and not line.lstrip().startswith('#')
+        ]
+
+
+class WordFilter:
+    """
+    Скомпилированный список слов.
+
+    Если указан файл, слова из него добавляются к встроенным, а при
+    изменении файла список перечитывается без перезапуска процесса.
+    """
+
+    def __init__(self, words=(), path=None):
+        self.words = tuple(words)
+        self.path = path
+        self.mtime = None
+        self.pattern = None
+        self.reload()
+
+    def reload(self):
+        words = self.words
+        if self.path:
+            self.mtime = os.stat(self.path).st_mtime
+            words += tuple(read_words(self.path))
+        self.pattern = compile_words(words)
+
+    def reload_if_changed(self):
+        if self.path and os.stat(self.path).st_mtime != self.mtime:
+            self.reload()
+
+    def search(self, text):
+        """Первое найденное запрещённое слово или None."""
+        self.reload_if_changed()
+        if self.pattern is None:
+            return None
+        match = self.pattern.search(normalize(text))
+        return match and match.group()
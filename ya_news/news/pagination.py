@@ -0,0 +1,56 @@
+"""Постраничная загрузка комментариев по ключу (created, id)."""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as DecodeError
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+CURSOR_SEPARATOR = '|'
+
+
+def encode_cursor(created, pk):
+    """Курсор указывает на последний показанный комментарий."""
+    value = f'{created.isoformat()}{CURSOR_SEPARATOR}{pk}'
+    return urlsafe_b64encode(value.encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        created, pk = urlsafe_b64decode(
+            cursor.encode()
+        ).decode().split(CURSOR_SEPARATOR)
+        created, pk = parse_datetime(created), int(pk)
+    except (DecodeError, UnicodeError, ValueError):
+        raise BadRequest('Некорректный курсор.')
+    if created is None:
+        raise BadRequest('Некорректный курсор.')
+    return created, pk
+
+
+def page_queryset(comments, cursor=None, size=None):
+    """
+    Запрос одной страницы комментариев с одним лишним в конце.
+
+    Вместо OFFSET используется условие по (created, id), поэтому стоимость
+    запроса не зависит от того, насколько глубоко пролистана лента.
+    """
+    size = size or settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    comments = comments.order_by('created', 'pk')
+    if cursor:
+        created, pk = decode_cursor(cursor)
+        comments = comments.filter(
+            Q(created__gt=created) | Q(created=created, pk__gt=pk)
+        )
+    return comments[:size + 1]
+
+
+def comments_page(comments, cursor=None, size=None):
+    """Возвращает страницу комментариев и курсор следующей страницы."""
+    size = size or settings.COMMENTS_COUNT_ON_DETAIL_PAGE
+    page = list(page_queryset(comments, cursor, size))
+    if len(page) <= size:
+        return page, None
+    last = page[size - 1]
+    return page[:size], encode_cursor(last.created, last.pk)
@@ -0,0 +1,74 @@
+"""
+Фоновая модерация комментариев.
+
+Очередь - сами комментарии в статусе «на модерации», поэтому внешний
+брокер не нужен: обработчик (manage.py moderation_worker) забирает их
+пачками, прогоняет через правила из COMMENT_MODERATION_RULES и
+публикует или отклоняет двумя запросами на пачку.
+
+Правило - функция, которая получает текст комментария и возвращает
+причину отказа или None.
+"""
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .forms import bad_words
+from .models import Comment
+
+BATCH_SIZE = 100
+
+
+def bad_words_rule(text):
+    word = bad_words.search(text)
+    return word and f'Запрещённое слово: {word}'
+
+
+def load_rules():
+    return [import_string(path) for path in settings.COMMENT_MODERATION_RULES]
+
+
+def is_rejected(text, rules):
+    return any(rule(text) for rule in rules)
+
+
+def unchanged(rows):
+    """Условие «комментарий не меняли с момента чтения»."""
+    return reduce(or_, (Q(pk=pk, updated=updated) for pk, updated in rows))
+
+
+def moderate_batch(batch_size=BATCH_SIZE, rules=None):
+    """
+    Обрабатывает пачку; возвращает число опубликованных и отклонённых.
+
+    Правила работают вне транзакции: долгая проверка не держит снимок
+    базы, из-за которого запись в SQLite в режиме WAL падала бы с
+    database is locked. Статус меняется только у комментариев, чьё
+    updated не изменилось с чтения: отредактированный во время проверки
+    текст остаётся на модерации до следующей пачки.
+    """
+    rules = load_rules() if rules is None else rules
+    pending = Comment.objects.filter(
+        status=Comment.Status.PENDING
+    ).order_by('pk').values_list('pk', 'text', 'updated')[:batch_size]
+    published, rejected = [], []
+    for pk, text, updated in pending:
+        (rejected if is_rejected(text, rules) else published).append(
+            (pk, updated)
+        )
+    counts = []
+    with transaction.atomic():
+        for rows, status in (
+            (published, Comment.Status.PUBLISHED),
+            (rejected, Comment.Status.REJECTED),
+        ):
+            counts.append(
+                Comment.objects.filter(
+                    unchanged(rows), status=Comment.Status.PENDING
+                ).update(status=status) if rows else 0
+            )
+    return tuple(counts)
@@ -0,0 +1,153 @@
+import json
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from news.forms import WARNING
+from news.models import ApiToken, Comment
+
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+
+def send(client, method, url, data):
+    return getattr(client, method)(
+        url, json.dumps(data), content_type='application/json'
+    )
+
+
+def test_news_fields_select_only_requested_columns(client, news):
+    url = reverse('news:api-news-detail', args=(news.pk,))
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url, {'fields': 'id,title'})
+    assert response.json() == {'id': news.pk, 'title': news.title}
+    sql = queries.captured_queries[-1]['sql']
+    assert '"text"' not in sql and '"comment_count"' not in sql
+
+    response = client.get(url, {'fields': 'id,secret'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
+def test_news_list_default_fields(client, many_news, settings):
+    results = client.get(reverse('news:api-news')).json()['results']
+    assert len(results) == settings.NEWS_COUNT_ON_HOME_PAGE
+    assert set(results[0]) == {'id', 'title', 'date', 'comment_count'}
+
+
+def test_comments_are_keyset_paginated(client, news, many_comments, settings):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 4
+    url = reverse('news:api-comments', args=(news.pk,))
+    texts, cursor = [], None
+    while True:
+        params = {'fields': 'text'}
+        if cursor:
+            params['after'] = cursor
+        with CaptureQueriesContext(connection) as queries:
+            data = client.get(url, params).json()
+        assert 'auth_user' not in queries.captured_queries[-1]['sql']
+        texts += [comment['text'] for comment in data['results']]
+        cursor = data['next']
+        if cursor is None:
+            break
+    assert texts == list(
+        Comment.objects.order_by('created', 'pk').values_list(
+            'text', flat=True
+        )
+    )
+
+
+def test_comment_create_goes_to_moderation(
+        client, author_client, news, bad_words_data
+):
+    url = reverse('news:api-comments', args=(news.pk,))
+    assert send(
+        client, 'post', url, {'text': 'Текст'}
+    ).status_code == HTTPStatus.UNAUTHORIZED
+
+    response = send(author_client, 'post', url, bad_words_data)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json()['errors'] == {'text': [WARNING]}
+
+    response = send(author_client, 'post', url + '?fields=id,status', {
+        'text': 'Текст'
+    })
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.json()['status'] == Comment.Status.PENDING
+    assert client.get(url).json()['results'] == []
+
+
+def test_only_author_can_change_comment(
+        author_client, another_author_client, comment
+):
+    url = reverse('news:api-comment', args=(comment.pk,))
+    for method, data in (('patch', {'text': 'Чужой'}), ('delete', {})):
+        response = send(another_author_client, method, url, data)
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    response = send(author_client, 'patch', url, {'text': 'Новый текст'})
+    assert response.json()['text'] == 'Новый текст'
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+
+    response = author_client.delete(url)
+    assert response.status_code == HTTPStatus.NO_CONTENT
+    assert not Comment.objects.filter(pk=comment.pk).exists()
+
+
+def test_token_client_needs_no_csrf(author, news):
+    key = ApiToken.objects.issue(author)
+    client = Client(
+        enforce_csrf_checks=True, HTTP_AUTHORIZATION=f'Token {key}'
+    )
+    response = send(
+        client, 'post', reverse('news:api-comments', args=(news.pk,)),
+        {'text': 'Текст'}
+    )
+    assert response.status_code == HTTPStatus.CREATED
+    assert Comment.objects.get().author == author
+
+
+@pytest.mark.parametrize('header', ('Token wrong', 'Bearer key'))
+def test_bad_token_is_rejected(news, header):
+    response = Client(HTTP_AUTHORIZATION=header).post(
+        reverse('news:api-comments', args=(news.pk,)),
+        json.dumps({'text': 'Текст'}), content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_session_client_needs_csrf_token(author, news, news_detail_url):
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(author)
+    url = reverse('news:api-comments', args=(news.pk,))
+    response = send(client, 'post', url, {'text': 'Текст'})
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    # Cookie csrftoken ставит страница новости с формой комментария.
+    client.get(news_detail_url)
+    response = client.post(
+        url, json.dumps({'text': 'Текст'}), content_type='application/json',
+        HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value
+    )
+    assert response.status_code == HTTPStatus.CREATED
+
+
+def test_bad_cursor_is_a_json_error(client, news):
+    response = client.get(
+        reverse('news:api-comments', args=(news.pk,)), {'after': 'не курсор'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'errors': {'__all__': ['Некорректный курсор.']}}
+
+
+def test_issue_api_token_command(author):
+    out = StringIO()
+    call_command('issue_api_token', author.username, stdout=out)
+    assert ApiToken.objects.user_for(out.getvalue().strip()) == author
@@ -0,0 +1,46 @@
+import asyncio
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from news.async_views import news_detail, news_list
+from news.views import NewsDetailView, NewsList
+
+
+# Асинхронные варианты ходят в базу из пула потоков, поэтому данные
+# теста должны быть закоммичены.
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+def test_async_views_render_same_pages(news, comment, monkeypatch):
+    # Метка начала потока событий не должна разойтись между отрисовками.
+    monkeypatch.setattr('news.views.time', lambda: 0)
+    for async_view, view_class, kwargs in (
+        (news_list, NewsList, {}),
+        (news_detail, NewsDetailView, {'pk': news.pk}),
+    ):
+        assert asyncio.iscoroutinefunction(async_view)
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        expected = view_class.as_view()(request, **kwargs)
+        expected.render()
+        response = asyncio.run(async_view(request, **kwargs))
+        assert response.status_code == expected.status_code
+        assert response.content == expected.content
+
+
+def test_async_views_run_concurrently(news, author):
+    async def load():
+        requests = [RequestFactory().get('/') for _ in range(5)]
+        for request in requests:
+            request.user = author
+        return await asyncio.gather(*(
+            news_detail(request, pk=news.pk) for request in requests
+        ))
+
+    assert {
+        response.status_code for response in asyncio.run(load())
+    } == {200}
@@ -0,0 +1,36 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+
+pytestmark = pytest.mark.django_db
+
+
+def test_news_list_budget(
+        scaled_news, author_client, news_home_url, assert_within_budget
+):
+    response = assert_within_budget(
+        'NewsList', lambda: author_client.get(news_home_url)
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_news_detail_budget(
+        scaled_news, author_client, news_detail_url, assert_within_budget
+):
+    response = assert_within_budget(
+        'NewsDetailView', lambda: author_client.get(news_detail_url)
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.parametrize(
+    'name, route', (('CommentUpdate', 'edit'), ('CommentDelete', 'delete'))
+)
+def test_comment_pages_budget(
+        scaled_news, comment, author_client, assert_within_budget, name, route
+):
+    url = reverse(f'news:{route}', args=(comment.pk,))
+    response = assert_within_budget(name, lambda: author_client.get(url))
+    assert response.status_code == HTTPStatus.OK
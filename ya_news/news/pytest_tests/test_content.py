@@ -1,7 +1,17 @@
+import re
+from datetime import timedelta
+from http import HTTPStatus
+
 import pytest
 from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
 
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.pipeline import moderate_batch
 
 
 pytestmark = pytest.mark.django_db
@@ -25,6 +35,149 @@ def test_news_order(client, news_home_url):
     assert news == news_sorted
 
 
+def test_news_comment_count(client, news_home_url, many_comments, news):
+    news_list = client.get(news_home_url).context['object_list']
+    assert news_list[0].comment_count == news.comment_set.count()
+
+
+@pytest.mark.parametrize('comments_per_news', (1, 200))
+def test_home_page_queries_do_not_grow_with_comments(
+        client, many_news, author, news_home_url, comments_per_news
+):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Текст')
+        for news in News.objects.all()
+        for _ in range(comments_per_news)
+    )
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(news_home_url)
+    assert len(queries) == 1
+    assert all(
+        news.comment_count == comments_per_news
+        for news in response.context['object_list']
+    )
+
+
+def test_anonymous_home_page_is_cached(client, news, news_home_url):
+    client.get(news_home_url)
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(news_home_url)
+    assert len(queries) == 0
+    assert news.title in response.content.decode()
+
+
+def test_home_page_cache_is_invalidated_by_comment(
+        client,
+        author_client,
+        news,
+        news_home_url,
+        news_detail_url,
+        form_data,
+        django_capture_on_commit_callbacks
+):
+    assert 'Комментариев' not in client.get(news_home_url).content.decode()
+    author_client.post(news_detail_url, data=form_data)
+    assert 'Комментариев' not in client.get(news_home_url).content.decode()
+    with django_capture_on_commit_callbacks(execute=True):
+        moderate_batch()
+    assert 'Комментариев: 1' in client.get(news_home_url).content.decode()
+
+
+def test_pending_comment_is_visible_only_to_author(
+        author_client,
+        another_author_client,
+        client,
+        news_detail_url
+):
+    text = 'Комментарий на проверке'
+    author_client.post(news_detail_url, data={'text': text})
+    assert 'На модерации' in author_client.get(
+        news_detail_url
+    ).content.decode()
+    for other_client in (another_author_client, client):
+        content = other_client.get(news_detail_url).content.decode()
+        assert text not in content
+    moderate_batch()
+    content = client.get(news_detail_url).content.decode()
+    assert text in content
+    assert 'На модерации' not in content
+
+
+def test_news_detail_conditional_get(
+        author_client, news_detail_url, comment, news_edit_url, form_data
+):
+    response = author_client.get(news_detail_url)
+    etag = response['ETag']
+    not_modified = author_client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+    author_client.post(news_edit_url, data={'text': 'Новый текст'})
+    modified = author_client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert modified.status_code == HTTPStatus.OK
+    assert 'Новый текст' in modified.content.decode()
+
+
+def test_news_detail_etag_follows_own_pending_comment(
+        author_client, news_detail_url
+):
+    etag = author_client.get(news_detail_url)['ETag']
+    author_client.post(news_detail_url, data={'text': 'Свой комментарий'})
+    response = author_client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert 'Свой комментарий' in response.content.decode()
+
+
+def test_news_detail_etag_changes_after_login(
+        client, author, news_detail_url
+):
+    author.set_password('password')
+    author.save()
+    credentials = {'username': author.username, 'password': 'password'}
+    client.post(reverse('users:login'), credentials)
+    etag = client.get(news_detail_url)['ETag']
+    assert client.get(
+        news_detail_url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    client.post(reverse('users:logout'))
+    # Вход меняет CSRF-токен, а с ним и форму на странице.
+    client.post(reverse('users:login'), credentials)
+    response = client.get(news_detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_news_detail_last_modified_only_for_anon(
+        client, author_client, news, news_detail_url
+):
+    News.objects.filter(pk=news.pk).update(
+        updated=timezone.now() - timedelta(minutes=1)
+    )
+    last_modified = client.get(news_detail_url)['Last-Modified']
+    assert client.get(
+        news_detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    # Страница, сохранённая анонимом, не годится после входа.
+    response = author_client.get(
+        news_detail_url, HTTP_IF_MODIFIED_SINCE=last_modified
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert 'Last-Modified' not in response
+
+
+def test_news_detail_fresh_change_has_no_last_modified(
+        client, news, news_detail_url
+):
+    assert 'Last-Modified' not in client.get(news_detail_url)
+
+
+def test_news_detail_etag_depends_on_user(
+        author_client, another_author_client, news_detail_url
+):
+    etag = author_client.get(news_detail_url)['ETag']
+    response = another_author_client.get(
+        news_detail_url, HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == HTTPStatus.OK
+
+
 def test_comments_order(client, news_detail_url):
     comments = list(
         client.get(news_detail_url).context['news'].comment_set.all()
@@ -36,6 +189,36 @@ def test_comments_order(client, news_detail_url):
     assert comments == comments_sorted
 
 
+def test_comments_are_paginated_by_cursor(
+        client, news, author, news_detail_url, settings
+):
+    settings.COMMENTS_COUNT_ON_DETAIL_PAGE = 3
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text=f'Текст {index}')
+        for index in range(7)
+    )
+    context = client.get(news_detail_url).context
+    texts = [comment.text for comment in context['comments']]
+    cursor = context['next_cursor']
+    comments_url = reverse('news:comments', args=(news.pk,))
+    while cursor:
+        page = client.get(comments_url, {'after': cursor}).json()
+        texts += re.findall(r'<p class="mb-0">(.*?)</p>', page['html'])
+        cursor = page['next']
+    assert texts == list(
+        Comment.objects.order_by('created', 'pk').values_list(
+            'text', flat=True
+        )
+    )
+
+
+def test_comments_bad_cursor(client, news):
+    response = client.get(
+        reverse('news:comments', args=(news.pk,)), {'after': 'не курсор'}
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+
+
 @pytest.mark.parametrize(
     'url, client, has_access',
     (
@@ -54,3 +237,43 @@ def test_comment_form_availability_for_different_users(
     assert has_access == ('form' in context)
     if has_access:
         assert isinstance(context['form'], CommentForm)
+
+
+def test_search_ranks_news_above_comments_and_highlights(
+        client, news, author
+):
+    other = News.objects.create(title='Погода', text='Снег <b>ёлки</b>')
+    Comment.objects.create(news=news, author=author, text='Снег и ёлки')
+    response = client.get(reverse('news:search'), {'q': 'елки'})
+    hits = response.context['hits']
+    assert [(hit.kind, hit.news_id) for hit in hits] == [
+        ('news', other.pk), ('comment', news.pk)
+    ]
+    assert (
+        '&lt;b&gt;<mark>елки</mark>&lt;/b&gt;' in response.content.decode()
+    )
+
+
+def test_search_pagination(client, settings):
+    settings.SEARCH_RESULTS_ON_PAGE = 2
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Общий текст')
+        for index in range(5)
+    )
+    seen, page = [], 1
+    while True:
+        response = client.get(
+            reverse('news:search'), {'q': 'общий', 'page': page}
+        )
+        seen += [hit.pk for hit in response.context['hits']]
+        if not response.context['has_next']:
+            break
+        page += 1
+    assert page == 3
+    assert sorted(seen) == sorted(News.objects.values_list('pk', flat=True))
+
+
+@pytest.mark.parametrize('page', ('0', 'два'))
+def test_search_bad_page(client, page):
+    response = client.get(reverse('news:search'), {'q': 'общий', 'page': page})
+    assert response.status_code == HTTPStatus.NOT_FOUND
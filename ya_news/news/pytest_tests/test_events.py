@@ -0,0 +1,112 @@
+import asyncio
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+
+from news.async_views import news_events
+from news.models import PRUNE_KEY, Comment, CommentEvent
+from news.pipeline import moderate_batch
+
+
+def read_events(client, news, last_id=0, **params):
+    """События потока и курсор для следующего подключения."""
+    headers = {} if last_id is None else {'HTTP_LAST_EVENT_ID': str(last_id)}
+    response = client.get(
+        reverse('news:events', args=(news.pk,)), params, **headers
+    )
+    assert response['Content-Type'] == 'text/event-stream'
+    return parse(response.content.decode(), last_id)
+
+
+def parse(body, last_id):
+    events = []
+    for block in body.split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines() if line
+        )
+        if 'id' in fields:
+            last_id = int(fields['id'])
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events, last_id
+
+
+@pytest.mark.django_db
+def test_stream_sends_only_changes_visible_to_reader(
+        client, author_client, news, news_detail_url
+):
+    _, anon_id = read_events(client, news)
+    _, author_id = read_events(author_client, news)
+    author_client.post(news_detail_url, data={'text': 'Свежий комментарий'})
+    comment = Comment.objects.get()
+    # Комментарий на модерации событий не пишет.
+    assert not CommentEvent.objects.exists()
+
+    comment.text = 'Исправленный комментарий'
+    comment.save()
+    events, author_id = read_events(author_client, news, author_id)
+    assert [event for event, _ in events] == ['comment']
+    assert events[0][1]['id'] == comment.pk
+    assert 'Исправленный комментарий' in events[0][1]['html']
+    events, anon_id = read_events(client, news, anon_id)
+    assert events == [('remove', {'id': comment.pk})]
+
+    moderate_batch()
+    events, anon_id = read_events(client, news, anon_id)
+    assert [event for event, _ in events] == ['comment']
+    assert read_events(client, news, anon_id) == ([], anon_id)
+
+    pk = comment.pk
+    comment.delete()
+    events, _ = read_events(client, news, anon_id)
+    assert events == [('remove', {'id': pk})]
+
+
+@pytest.mark.django_db
+def test_stream_starts_from_page_render(client, news, comment):
+    assert read_events(client, news, last_id=None)[0] == []
+    events, _ = read_events(
+        client, news, last_id=None,
+        since=int(comment.created.timestamp()) - 1
+    )
+    assert events == [('comment', events[0][1])]
+    assert events[0][1]['id'] == comment.pk
+
+
+@pytest.mark.django_db
+def test_wsgi_answers_at_once(client, news, settings):
+    settings.COMMENT_EVENTS_STREAM_SECONDS = 60
+    response = client.get(reverse('news:events', args=(news.pk,)))
+    assert response.content.decode().startswith(
+        f'retry: {settings.COMMENT_EVENTS_WSGI_RETRY_MS}\n\n'
+    )
+
+
+@pytest.mark.django_db
+def test_old_events_are_pruned_on_write(news, comment):
+    cache.delete(PRUNE_KEY)
+    CommentEvent.objects.update(created=timezone.now() - timedelta(days=1))
+    old = CommentEvent.objects.get()
+    comment.save()
+    assert list(CommentEvent.objects.values_list('pk', flat=True)) == [
+        old.pk + 1
+    ]
+    # До следующей чистки события копятся.
+    comment.save()
+    assert CommentEvent.objects.count() == 2
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_stream_returns_batch(news, comment):
+    request = RequestFactory().get('/', HTTP_LAST_EVENT_ID='0')
+    request.user = AnonymousUser()
+    response = asyncio.run(news_events(request, pk=news.pk))
+    events, last_id = parse(response.content.decode(), 0)
+    assert [event for event, _ in events] == ['comment']
+    assert last_id == CommentEvent.objects.get().pk
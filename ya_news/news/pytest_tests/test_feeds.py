@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from news.models import Comment, News
+
+
+pytestmark = [
+    pytest.mark.django_db,
+]
+
+RSS_URL = reverse('news:rss')
+ATOM_URL = reverse('news:atom')
+
+
+@pytest.mark.parametrize('url', (RSS_URL, ATOM_URL))
+def test_feed_has_home_page_news(client, many_news, settings, url):
+    content = client.get(url).content.decode()
+    titles = News.objects.values_list(
+        'title', flat=True
+    )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+    positions = [content.index(f'<title>{title}</title>') for title in titles]
+    assert positions == sorted(positions)
+    assert News.objects.last().title not in content
+
+
+def test_cached_feed_costs_no_queries(
+        client, news, django_assert_num_queries
+):
+    client.get(RSS_URL)
+    with django_assert_num_queries(0):
+        response = client.get(RSS_URL)
+    assert news.title in response.content.decode()
+    not_modified = client.get(
+        RSS_URL, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_feed_cache_is_reset_by_news_only(
+        client, news, author, django_assert_num_queries,
+        django_capture_on_commit_callbacks
+):
+    client.get(RSS_URL)
+    with django_capture_on_commit_callbacks(execute=True):
+        Comment.objects.create(news=news, author=author, text='Текст')
+    with django_assert_num_queries(0):
+        client.get(RSS_URL)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        News.objects.create(title='Свежая новость', text='Текст')
+    assert 'Свежая новость' in client.get(RSS_URL).content.decode()
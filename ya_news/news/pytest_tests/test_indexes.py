@@ -0,0 +1,53 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+
+from news.models import Comment
+from news.pagination import encode_cursor, page_queryset
+from news.views import CommentUpdate, NewsList
+
+
+pytestmark = [
+    pytest.mark.django_db,
+    pytest.mark.skipif(
+        connection.vendor != 'sqlite',
+        reason='План запроса проверяется через EXPLAIN QUERY PLAN SQLite.'
+    ),
+]
+
+FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+def assert_uses_index(queryset):
+    plan = queryset.explain()
+    assert not FULL_SCAN.search(plan), plan
+    assert not TEMP_SORT.search(plan), plan
+
+
+def test_news_list_uses_index():
+    assert_uses_index(NewsList().get_queryset())
+
+
+def test_news_comments_use_index(news, comment):
+    comments = news.comment_set.select_related('author')
+    assert_uses_index(page_queryset(comments))
+    assert_uses_index(page_queryset(
+        comments, encode_cursor(comment.created, comment.pk)
+    ))
+
+
+def test_comment_edit_uses_index(author, comment):
+    request = RequestFactory().get('/')
+    request.user = author
+    view = CommentUpdate(request=request, kwargs={'pk': comment.pk})
+    # get_object() вызывает get(), а он сбрасывает сортировку.
+    assert_uses_index(view.get_queryset().filter(pk=comment.pk).order_by())
+
+
+def test_author_comments_use_index(author):
+    assert_uses_index(
+        Comment.objects.filter(author=author).order_by('created')
+    )
@@ -1,10 +1,18 @@
 from http import HTTPStatus
+from io import StringIO
 
 import pytest
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 from pytest_django.asserts import assertRedirects, assertFormError
 
-from news.models import Comment
-from news.forms import WARNING
+from news.models import Comment, CommentEvent, News
+from news.forms import WARNING, CommentForm
+from news.moderation import WordFilter
+from news.pipeline import moderate_batch
+from news.search import search
 
 
 pytestmark = [
@@ -44,6 +52,20 @@ def test_author_can_create_comment(
     assert new_comment.author == author
 
 
+def test_new_comment_is_a_single_write(
+        author_client, news_detail_url, form_data
+):
+    with CaptureQueriesContext(connection) as queries:
+        author_client.post(news_detail_url, data=form_data)
+    writes = [
+        query['sql'] for query in queries.captured_queries
+        if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))
+        and 'django_session' not in query['sql']
+    ]
+    assert len(writes) == 1
+    assert writes[0].startswith('INSERT INTO "news_comment"')
+
+
 def test_user_cant_use_bad_words(
         author_client,
         news_detail_url,
@@ -55,6 +77,58 @@ def test_user_cant_use_bad_words(
     assert comments_under_post == set(Comment.objects.all())
 
 
+def test_invalid_comment_keeps_comments_on_page(
+        author_client, news_detail_url, comment, bad_words_data
+):
+    response = author_client.post(news_detail_url, data=bad_words_data)
+    assert list(response.context['comments']) == [comment]
+    assert 'events_since' in response.context
+    assert comment.text in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    'text, is_bad',
+    (
+        ('Ты редиска', True),
+        ('Ты РЕДИСКА!', True),
+        ('Ты р.е.д.и.с.к.а', True),
+        ('Ты peдиcкa', True),
+        ('Ты редиииска', True),
+        ('Негодяйский поступок', True),
+        ('Наши редиски лучше всех', False),
+        ('Благородный поступок', False),
+        ('Купил редис, как и вчера', False),
+        ('Мы поехали в Редис к арене', False),
+        ('Это не годяйский', False),
+        ('Ты р_е_д_и_с_к_а', True),
+    )
+)
+def test_bad_words_filter(text, is_bad):
+    assert bool(WordFilter(('редиска', 'негодяй')).search(text)) == is_bad
+
+
+@pytest.mark.parametrize('text', (
+    'Купил редис, как и вчера',
+    'Мы поехали в Редис к арене',
+    'Это не годяйский',
+))
+def test_comment_form_accepts_words_across_boundaries(text):
+    assert CommentForm(data={'text': text}).is_valid()
+
+
+def test_bad_words_file_is_reloaded(tmp_path):
+    words_file = tmp_path / 'words.txt'
+    words_file.write_text('# слова\nредиска\n', encoding='utf-8')
+    word_filter = WordFilter(path=words_file)
+    assert word_filter.search('Ты редиска')
+    assert not word_filter.search('Ты негодяй')
+    words_file.write_text('негодяй\n', encoding='utf-8')
+    # Запись могла уложиться в ту же отметку времени изменения файла.
+    word_filter.mtime = None
+    assert word_filter.search('Ты негодяй')
+    assert not word_filter.search('Ты редиска')
+
+
 def test_author_can_edit_comment(
         author_client,
         author,
@@ -105,3 +179,232 @@ def test_other_user_cant_delete_comment(
     assert admin_client.post(
         news_delete_url).status_code == HTTPStatus.NOT_FOUND
     assert Comment.objects.filter(pk=comment.pk).exists()
+
+
+def test_comment_stats_follow_create_and_delete(
+        author_client,
+        news_detail_url,
+        news,
+        form_data
+):
+    author_client.post(news_detail_url, data=form_data)
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    moderate_batch()
+    news.refresh_from_db()
+    comment = Comment.objects.get(news=news)
+    assert news.comment_count == 1
+    assert news.last_comment_at == comment.created
+
+    author_client.post(reverse('news:delete', args=(comment.pk,)))
+    news.refresh_from_db()
+    assert news.comment_count == 0
+    assert news.last_comment_at is None
+
+
+def no_spam_rule(text):
+    return 'spam' in text and 'Реклама'
+
+
+def test_moderation_worker_publishes_and_rejects(
+        author_client,
+        news_detail_url,
+        news,
+        settings
+):
+    settings.COMMENT_MODERATION_RULES = (
+        'news.pytest_tests.test_logic.no_spam_rule',
+    )
+    author_client.post(news_detail_url, data={'text': 'Хорошая новость'})
+    author_client.post(news_detail_url, data={'text': 'Купите spam'})
+    assert set(Comment.objects.values_list('status', flat=True)) == {
+        Comment.Status.PENDING
+    }
+    out = StringIO()
+    call_command('moderation_worker', once=True, batch_size=1, stdout=out)
+    assert dict(Comment.objects.values_list('text', 'status')) == {
+        'Хорошая новость': Comment.Status.PUBLISHED,
+        'Купите spam': Comment.Status.REJECTED,
+    }
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_edited_comment_is_moderated_again(
+        author_client,
+        news_edit_url,
+        comment,
+        news,
+        form_data
+):
+    author_client.post(news_edit_url, data=form_data)
+    comment.refresh_from_db()
+    news.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+    assert news.comment_count == 0
+    assert moderate_batch() == (1, 0)
+    news.refresh_from_db()
+    assert news.comment_count == 1
+
+
+def test_comment_edited_during_check_stays_pending(comment):
+    Comment.objects.filter(pk=comment.pk).update(
+        status=Comment.Status.PENDING
+    )
+
+    def edit_during_check(text):
+        edited = Comment.objects.get(pk=comment.pk)
+        edited.text = 'ты редиска'
+        edited.status = Comment.Status.PENDING
+        edited.save()
+
+    assert moderate_batch(rules=[edit_during_check]) == (0, 0)
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.PENDING
+    assert moderate_batch() == (0, 1)
+    comment.refresh_from_db()
+    assert comment.status == Comment.Status.REJECTED
+
+
+def test_moderation_worker_survives_locked_database(monkeypatch):
+    def locked(*args):
+        monkeypatch.undo()
+        raise OperationalError('database is locked')
+
+    monkeypatch.setattr(
+        'news.management.commands.moderation_worker.moderate_batch', locked
+    )
+    err = StringIO()
+    call_command(
+        'moderation_worker', once=True, interval=0, stdout=StringIO(),
+        stderr=err
+    )
+    assert 'database is locked' in err.getvalue()
+
+
+def test_comment_stats_follow_bulk_operations(news, author):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=author, text='Текст') for _ in range(5)
+    )
+    news.refresh_from_db()
+    assert news.comment_count == 5
+
+    Comment.objects.filter(
+        pk__in=Comment.objects.values('pk')[:2]
+    ).delete()
+    news.refresh_from_db()
+    assert news.comment_count == 3
+
+
+def test_comment_stats_follow_author_deletion(
+        news, author, another_author
+):
+    Comment.objects.bulk_create(
+        Comment(news=news, author=user, text='Текст')
+        for user in (author, author, another_author)
+    )
+    author.delete()
+    news.refresh_from_db()
+    assert news.comment_count == 1
+    assert news.last_comment_at == Comment.objects.get().created
+
+
+def test_recount_comments_repairs_stats(many_comments, news):
+    News.objects.update(comment_count=0, last_comment_at=None)
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    assert news.comment_count == Comment.objects.filter(news=news).count()
+    assert news.last_comment_at == Comment.objects.latest('created').created
+
+
+def test_seed_is_deterministic(django_user_model):
+    def seed(prefix):
+        call_command(
+            'seed', users=3, news=5, comments=40, batch_size=7,
+            prefix=prefix, stdout=StringIO()
+        )
+        return list(Comment.objects.order_by('pk').values_list(
+            'text', 'created'
+        ))
+
+    first = seed('first')
+    assert len(first) == 40
+    assert not CommentEvent.objects.exists()
+    assert django_user_model.objects.count() == 3
+    Comment.objects.all().delete()
+    assert seed('second') == first
+    assert sum(
+        News.objects.values_list('comment_count', flat=True)
+    ) == Comment.objects.count()
+
+
+def test_seed_refuses_used_prefix(django_user_model):
+    options = dict(users=3, news=2, comments=5, stdout=StringIO())
+    call_command('seed', **options)
+    with pytest.raises(CommandError, match='--prefix'):
+        call_command('seed', **options)
+    assert django_user_model.objects.count() == 3
+    assert News.objects.count() == 2
+
+
+def found(query):
+    return [(hit.kind, hit.pk) for hit in search(query)[0]]
+
+
+def test_search_index_follows_news(news):
+    assert found('заголовок') == [('news', news.pk)]
+    news.title = 'Новый'
+    news.save()
+    assert found('заголовок') == []
+    News.objects.filter(pk=news.pk).update(text='Обновлённый')
+    assert found('обновленный') == [('news', news.pk)]
+    news.delete()
+    assert found('новый') == []
+
+
+def test_search_index_follows_comment_moderation(
+        author_client, news_detail_url, news, another_author
+):
+    author_client.post(news_detail_url, data={'text': 'Интересная статья'})
+    assert found('интересная') == []
+    moderate_batch()
+    comment = Comment.objects.get()
+    assert found('интересная') == [('comment', comment.pk)]
+    comment.delete()
+    assert found('интересная') == []
+    Comment.objects.bulk_create(
+        Comment(news=news, author=another_author, text='Скучная статья')
+        for _ in range(2)
+    )
+    assert len(found('скучная')) == 2
+    Comment.objects.update(status=Comment.Status.REJECTED)
+    assert found('скучная') == []
+
+
+def test_rebuild_search_index(news, comment):
+    News.objects.filter(pk=news.pk).delete()
+    News.objects.create(title='Другая', text='Текст')
+    call_command('rebuild_search_index', stdout=StringIO())
+    assert [kind for kind, _ in found('текст')] == ['news']
+
+
+def test_search_without_fts5(monkeypatch, news, author):
+    monkeypatch.setattr(
+        'news.search.search_enabled', lambda using='default': False
+    )
+    other = News.objects.create(title='Погода', text='Снег <b>и ёлки</b>')
+    comment = Comment.objects.create(
+        news=news, author=author, text='Снег выпал'
+    )
+    hits, has_next = search('Снег')
+    assert [(hit.kind, hit.pk) for hit in hits] == [
+        ('news', other.pk), ('comment', comment.pk)
+    ]
+    assert not has_next
+    assert hits[0].snippet == '<mark>Снег</mark> &lt;b&gt;и ёлки&lt;/b&gt;'
+    assert hits[1].title == news.title
+    assert search('Снег', size=1) == ([hits[0]], True)
+    assert search('Снег', page=2, size=1) == ([hits[1]], False)
+    Comment.objects.update(status=Comment.Status.REJECTED)
+    assert found('Снег выпал') == []
+    call_command('rebuild_search_index', stdout=StringIO())
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from django.db import connection
+
+from news.models import News
+from news.profiling import RequestProfile, fingerprint
+
+
+@pytest.fixture
+def profiling(settings, tmp_path):
+    settings.SQL_PROFILING_RATE = 1
+    settings.SQL_PROFILING_SLOW_MS = 0
+    settings.SQL_PROFILING_LOG = tmp_path / 'slow.jsonl'
+    return settings.SQL_PROFILING_LOG
+
+
+def test_fingerprint_drops_values():
+    assert fingerprint(
+        "SELECT *  FROM t WHERE id = 5 AND name = 'a''b' AND pk IN (%s, %s)"
+    ) == 'SELECT * FROM t WHERE id = ? AND name = ? AND pk IN (...)'
+
+
+@pytest.mark.django_db
+def test_profile_finds_repeated_queries(many_news):
+    profile = RequestProfile()
+    with connection.execute_wrapper(profile):
+        for news in News.objects.all()[:3]:
+            News.objects.filter(pk=news.pk).exists()
+    assert [count for _, count in profile.duplicates] == [3]
+
+
+@pytest.mark.django_db
+def test_slow_request_is_logged(
+        profiling, author_client, news_detail_url, comment
+):
+    response = author_client.get(news_detail_url)
+    assert response['Server-Timing'].startswith('db;dur=')
+    assert 'render;dur=' in response['Server-Timing']
+    entry = json.loads(profiling.read_text(encoding='utf-8'))
+    assert entry['path'] == news_detail_url
+    assert entry['queries'] > 0
+    assert entry['render_ms'] > 0
+
+
+@pytest.mark.django_db
+def test_render_time_is_split_by_template_and_block(
+        profiling, author_client, news_detail_url, comment
+):
+    response = author_client.get(news_detail_url)
+    assert 'tpl0;dur=' in response['Server-Timing']
+    templates = {
+        item['name']: item for item in json.loads(
+            profiling.read_text(encoding='utf-8')
+        )['templates']
+    }
+    assert {
+        'news/detail.html', 'base.html', 'news/detail.html#content',
+        'includes/header.html', 'news/includes/comments.html',
+    } <= templates.keys()
+    page = templates['news/detail.html']
+    assert page['ms'] >= templates['news/detail.html#content']['ms']
+    assert page['own_ms'] <= page['ms']
+
+
+@pytest.mark.django_db
+def test_profiling_is_off_by_default(client, news_detail_url):
+    assert 'Server-Timing' not in client.get(news_detail_url)
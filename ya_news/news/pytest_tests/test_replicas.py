@@ -0,0 +1,88 @@
+import pytest
+from django.db import connections
+
+from news.models import Comment, News
+from news.routers import PIN_COOKIE, ReplicaRouter, read_from_replica
+
+
+# Данные копируются в реплику из основной базы, поэтому они должны
+# быть закоммичены.
+pytestmark = [
+    pytest.mark.django_db(transaction=True),
+]
+
+
+class Replica:
+    """Реплика в отдельном файле SQLite, которую догоняет sync()."""
+    alias = 'replica'
+
+    def __init__(self, name):
+        connections.settings[self.alias] = {
+            **connections.settings['default'], 'NAME': str(name)
+        }
+
+    def sync(self):
+        source, target = connections['default'], connections[self.alias]
+        source.ensure_connection()
+        target.ensure_connection()
+        source.connection.backup(target.connection)
+
+    def remove(self):
+        connections[self.alias].close()
+        del connections[self.alias]
+        del connections.settings[self.alias]
+
+
+@pytest.fixture
+def replica(transactional_db, settings, tmp_path):
+    replica = Replica(tmp_path / 'replica.sqlite3')
+    settings.DATABASE_REPLICAS = [replica.alias]
+    yield replica
+    replica.remove()
+
+
+def test_read_only_pages_read_from_replica(author_client, news, replica):
+    replica.sync()
+    News.objects.filter(pk=news.pk).update(title='Новый заголовок')
+    assert news.title in author_client.get('/').content.decode()
+    replica.sync()
+    assert 'Новый заголовок' in author_client.get('/').content.decode()
+
+
+def test_stale_replica_page_is_not_cached_for_long(
+        client, news, replica, settings
+):
+    settings.REPLICA_PIN_SECONDS = 0
+    replica.sync()
+    News.objects.filter(pk=news.pk).update(title='Новый заголовок')
+    assert news.title in client.get('/').content.decode()
+    replica.sync()
+    assert 'Новый заголовок' in client.get('/').content.decode()
+
+
+def test_author_reads_own_writes_after_post(
+        author_client, news, news_detail_url, replica
+):
+    replica.sync()
+    response = author_client.post(
+        news_detail_url, data={'text': 'Свежий комментарий'}
+    )
+    assert response.cookies[PIN_COOKIE].value
+    assert Comment.objects.filter(text='Свежий комментарий').exists()
+    assert not Comment.objects.using(replica.alias).exists()
+    assert 'Свежий комментарий' in author_client.get(
+        news_detail_url
+    ).content.decode()
+
+    del author_client.cookies[PIN_COOKIE]
+    assert 'Свежий комментарий' not in author_client.get(
+        news_detail_url
+    ).content.decode()
+
+
+def test_request_reads_from_one_replica(settings):
+    settings.DATABASE_REPLICAS = ['first', 'second']
+    router = ReplicaRouter()
+    assert router.db_for_read(News) is None
+    with read_from_replica():
+        assert len({router.db_for_read(News) for _ in range(50)}) == 1
@@ -0,0 +1,33 @@
+import importlib
+
+import pytest
+from django.db.utils import ConnectionHandler
+
+
+@pytest.fixture
+def prod(monkeypatch):
+    monkeypatch.setenv('DJANGO_SECRET_KEY', 'secret')
+    return importlib.reload(importlib.import_module('yanews.settings.prod'))
+
+
+def test_prod_settings(prod):
+    assert not prod.DEBUG
+    assert prod.SECRET_KEY == 'secret'
+    assert prod.DATABASES['default']['CONN_MAX_AGE'] > 0
+    (loader, _), = prod.TEMPLATES[0]['OPTIONS']['loaders']
+    assert loader == 'django.template.loaders.cached.Loader'
+
+
+def test_prod_database_pragmas(prod, tmp_path, django_db_blocker):
+    connections = ConnectionHandler({'default': {
+        **prod.DATABASES['default'], 'NAME': tmp_path / 'db.sqlite3'
+    }})
+    with django_db_blocker.unblock():
+        with connections['default'].cursor() as cursor:
+            values = [
+                cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'synchronous', 'busy_timeout')
+            ]
+    connections.close_all()
+    # synchronous=NORMAL - это 1.
+    assert values == ['wal', 1, 5000]
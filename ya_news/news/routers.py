@@ -0,0 +1,96 @@
+"""
+Чтение из реплик.
+
+Страницы, которые только читают (ReplicaReadMixin), на GET и HEAD
+читают из реплики из DATABASE_REPLICAS - вместе с сессией,
+пользователем и ленивыми запросами шаблона. Остальные запросы и любая
+запись идут в основную базу. После запроса, который может менять
+данные, клиент получает cookie и ещё REPLICA_PIN_SECONDS читает из
+основной базы, чтобы видеть свои изменения, пока реплики догоняют.
+
+Реплика выбирается один раз на запрос: все его чтения видят одно и то
+же состояние, даже если реплики отстают по-разному.
+
+Реплики заполняет репликация, поэтому миграции к ним не применяются.
+Проекты не делят код, поэтому в ya_note лежит такой же notes.routers;
+правки роутера нужно вносить в оба.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from random import choice
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PIN_COOKIE = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+# Реплика, из которой читает текущий запрос, или None.
+replica_alias = ContextVar('replica_alias', default=None)
+
+
+@contextmanager
+def read_from_replica():
+    token = replica_alias.set(choice(settings.DATABASE_REPLICAS))
+    try:
+        yield
+    finally:
+        replica_alias.reset(token)
+
+
+class ReplicaRouter:
+
+    def db_for_read(self, model, **hints):
+        return replica_alias.get()
+
+    def db_for_write(self, model, **hints):
+        # Без явного ответа Django пишет туда, откуда объект прочитан.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет клиента за основной базой после изменяющего запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+
+class ReplicaReadMixin:
+    """
+    GET и HEAD представления читают из реплики.
+
+    Ответ отрисовывается здесь же, чтобы и ленивые запросы шаблона
+    ушли в реплику. Стоит первым среди базовых классов, чтобы проверка
+    входа тоже читала сессию и пользователя из реплики.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if (
+            not settings.DATABASE_REPLICAS
+            or request.method not in ('GET', 'HEAD')
+            or PIN_COOKIE in request.COOKIES
+        ):
+            return super().dispatch(request, *args, **kwargs)
+        with read_from_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
@@ -0,0 +1,302 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+Индекс - две виртуальные таблицы SQLite FTS5: NEWS_TABLE с заголовком и
+текстом новости и COMMENT_TABLE с текстами опубликованных комментариев;
+rowid совпадает с id записи. Сохранение и удаление новостей и
+сохранение комментариев отслеживают сигналы из signals.py; удаление
+комментариев и массовые операции - Comment, NewsQuerySet и
+CommentQuerySet. С нуля индекс строит команда rebuild_search_index.
+Выдача упорядочена по bm25 и листается страницами со смещением, как
+поиск по заметкам: оценка bm25 зависит от всего корпуса и меняется с
+каждой новой записью, поэтому ключом страницы быть не может.
+
+На базах без FTS5 индекс не ведётся, а поиск идёт запросами icontains
+по самим таблицам (см. search_without_index): медленнее и без учёта
+«ё», зато с той же выдачей - сначала новости, потом комментарии.
+"""
+import re
+import sqlite3
+from collections import namedtuple
+from contextlib import closing
+from functools import lru_cache, reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import CharField, F, Q, Value
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+NEWS_TABLE = 'news_news_fts'
+COMMENT_TABLE = 'news_comment_fts'
+TITLE_WEIGHT = 10
+TEXT_WEIGHT = 1
+# Совпадение в комментарии ценится вдвое меньше, чем в самой новости.
+COMMENT_WEIGHT = 0.5
+SNIPPET_WORDS = 16
+MAX_QUERY_WORDS = 10
+WORD = re.compile(r'\w+')
+# Границы подсветки из области частного использования Unicode: их
+# не бывает в тексте, и они переживают экранирование HTML.
+MARK_START, MARK_END = '\ue000', '\ue001'
+
+Hit = namedtuple('Hit', ('kind', 'pk', 'news_id', 'title', 'snippet'))
+
+
+def normalize(text):
+    """
+    «Е» вместо «ё», которую FTS5 не сводит к «е».
+
+    Регистр сохраняется: из индекса берутся фрагменты для выдачи, а
+    регистр токенизатор FTS5 не различает и сам.
+    """
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+@lru_cache(maxsize=None)
+def fts5_compiled():
+    """
+    Есть ли FTS5 в библиотеке SQLite. Она общая для всех соединений
+    процесса, поэтому хватает проверки на базе в памяти.
+    """
+    with closing(sqlite3.connect(':memory:')) as connection:
+        return bool(connection.execute(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).fetchone()[0])
+
+
+def search_enabled(using='default'):
+    """Ведётся ли индекс FTS5; без него поиск идёт по самим таблицам."""
+    return connections[using].vendor == 'sqlite' and fts5_compiled()
+
+
+def write_rows(using, sql, rows):
+    """executemany читает строки из итератора, не собирая их в память."""
+    if not search_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def index_news(news, using='default'):
+    write_rows(
+        using,
+        f'INSERT OR REPLACE INTO {NEWS_TABLE} (rowid, title, text) '
+        'VALUES (%s, %s, %s)',
+        (
+            (item.pk, normalize(item.title), normalize(item.text))
+            for item in news
+        )
+    )
+
+
+def index_comments(comments, using='default'):
+    """Опубликованные комментарии попадают в индекс, остальные - нет."""
+    comments = list(comments)
+    unindex(
+        COMMENT_TABLE,
+        [comment.pk for comment in comments if not comment.is_published],
+        using
+    )
+    write_rows(
+        using,
+        f'INSERT OR REPLACE INTO {COMMENT_TABLE} (rowid, news_id, text) '
+        'VALUES (%s, %s, %s)',
+        (
+            (comment.pk, comment.news_id, normalize(comment.text))
+            for comment in comments if comment.is_published
+        )
+    )
+
+
+def unindex(table, ids, using='default'):
+    if ids:
+        write_rows(
+            using,
+            f'DELETE FROM {table} WHERE rowid = %s',
+            ((pk,) for pk in ids)
+        )
+
+
+def clear(using='default'):
+    if not search_enabled(using):
+        return
+    with connections[using].cursor() as cursor:
+        for table in (NEWS_TABLE, COMMENT_TABLE):
+            cursor.execute(f'DELETE FROM {table}')
+
+
+def folded(column):
+    """normalize() на SQL."""
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def rebuild(using='default'):
+    """Заполняет индекс заново одним проходом по таблицам на SQL."""
+    if not search_enabled(using):
+        return
+    clear(using)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {NEWS_TABLE} (rowid, title, text) '
+            f'SELECT id, {folded("title")}, {folded("text")} FROM news_news'
+        )
+        cursor.execute(
+            f'INSERT INTO {COMMENT_TABLE} (rowid, news_id, text) '
+            f'SELECT id, news_id, {folded("text")} FROM news_comment '
+            "WHERE status = 'published'"
+        )
+
+
+def match_expression(query):
+    """
+    Слова в кавычках, последнее - как начало слова.
+
+    Кавычки отключают операторы FTS5, поэтому ввод пользователя
+    не ломает разбор запроса.
+    """
+    query_words = WORD.findall(normalize(query).lower())[:MAX_QUERY_WORDS]
+    if not query_words:
+        return None
+    return ' '.join(f'"{word}"' for word in query_words) + '*'
+
+
+def highlight(text):
+    """Экранирует фрагмент и превращает границы совпадений в <mark>."""
+    return mark_safe(
+        escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>')
+    )
+
+
+SEARCH_SQL = f'''
+SELECT hits.kind, hits.pk, hits.news_id,
+       COALESCE(hits.title, news_news.title), hits.snippet
+FROM (
+    SELECT bm25({NEWS_TABLE}, {TITLE_WEIGHT}, {TEXT_WEIGHT}) AS score,
+           'news' AS kind, rowid AS pk, rowid AS news_id,
+           highlight({NEWS_TABLE}, 0, %s, %s) AS title,
+           snippet({NEWS_TABLE}, 1, %s, %s, '…', %s) AS snippet
+    FROM {NEWS_TABLE} WHERE {NEWS_TABLE} MATCH %s
+    UNION ALL
+    SELECT bm25({COMMENT_TABLE}, 0, {TEXT_WEIGHT}) * {COMMENT_WEIGHT},
+           'comment', rowid, news_id, NULL,
+           snippet({COMMENT_TABLE}, 1, %s, %s, '…', %s)
+    FROM {COMMENT_TABLE} WHERE {COMMENT_TABLE} MATCH %s
+) AS hits
+JOIN news_news ON news_news.id = hits.news_id
+LEFT JOIN news_comment
+    ON hits.kind = 'comment' AND news_comment.id = hits.pk
+WHERE hits.kind = 'news' OR news_comment.status = 'published'
+ORDER BY hits.score, hits.kind, hits.pk
+LIMIT %s OFFSET %s
+'''
+
+
+def search(query, page=1, size=None, using='default'):
+    """
+    Страница совпадений и признак того, что есть следующая.
+
+    Меньшая оценка bm25 означает лучшее совпадение. Соединение с
+    таблицами новостей и комментариев отбрасывает записи индекса,
+    оставшиеся от удалённых каскадом или скрытых записей.
+    """
+    size = size or settings.SEARCH_RESULTS_ON_PAGE
+    offset = (page - 1) * size
+    match = match_expression(query)
+    if match is None:
+        return [], False
+    if not search_enabled(using):
+        return search_without_index(query, offset, size, using)
+    with connections[using].cursor() as cursor:
+        marks = (MARK_START, MARK_END)
+        cursor.execute(SEARCH_SQL, (
+            *marks, *marks, SNIPPET_WORDS, match,
+            *marks, SNIPPET_WORDS, match,
+            size + 1, offset,
+        ))
+        hits = [
+            Hit(kind, pk, news_id, highlight(title), highlight(text))
+            for kind, pk, news_id, title, text in cursor.fetchall()
+        ]
+    return hits[:size], len(hits) > size
+
+
+def contains_all(query_words, *fields):
+    """Каждое слово есть хотя бы в одном из полей."""
+    return reduce(and_, (
+        reduce(or_, (Q(**{f'{field}__icontains': word}) for field in fields))
+        for word in query_words
+    ))
+
+
+def mark_words(text, query_words):
+    pattern = re.compile(
+        '|'.join(map(re.escape, query_words)), re.IGNORECASE
+    )
+    return pattern.sub(lambda match: MARK_START + match[0] + MARK_END, text)
+
+
+def text_snippet(text, query_words):
+    """Около SNIPPET_WORDS слов вокруг первого совпадения, как snippet()."""
+    text_words = text.split()
+    first = next(
+        (
+            number for number, word in enumerate(text_words)
+            if any(
+                query.lower() in word.lower() for query in query_words
+            )
+        ),
+        0
+    )
+    start = max(0, min(first - 1, len(text_words) - SNIPPET_WORDS))
+    end = start + SNIPPET_WORDS
+    snippet = ' '.join(text_words[start:end])
+    if start:
+        snippet = '…' + snippet
+    if end < len(text_words):
+        snippet += '…'
+    return mark_words(snippet, query_words)
+
+
+def search_without_index(query, offset, size, using='default'):
+    """
+    Поиск без FTS5: сначала новости, потом комментарии, новые выше.
+
+    Слова ищутся подстрокой, поэтому любое из них может быть началом
+    слова. Регистр кириллицы SQLite в icontains различает.
+    """
+    from .models import Comment, News
+
+    query_words = WORD.findall(query)[:MAX_QUERY_WORDS]
+    # Только аннотации: поля модели Django ставит в SELECT раньше
+    # аннотаций, и столбцы двух частей UNION разошлись бы.
+    news = News.objects.using(using).filter(
+        contains_all(query_words, 'title', 'text')
+    ).annotate(
+        hit_kind=Value('news', output_field=CharField()), hit_pk=F('pk'),
+        hit_news=F('pk'), hit_title=F('title'), hit_text=F('text')
+    )
+    comments = Comment.objects.using(using).published().filter(
+        contains_all(query_words, 'text')
+    ).annotate(
+        hit_kind=Value('comment', output_field=CharField()), hit_pk=F('pk'),
+        hit_news=F('news_id'), hit_title=F('news__title'),
+        hit_text=F('text')
+    )
+    columns = ('hit_kind', 'hit_pk', 'hit_news', 'hit_title', 'hit_text')
+    rows = news.order_by().values_list(*columns).union(
+        comments.order_by().values_list(*columns), all=True
+    ).order_by('-hit_kind', '-hit_pk')[
+        offset:offset + size + 1
+    ]
+    hits = [
+        Hit(
+            kind, pk, news_id,
+            highlight(mark_words(title, query_words) if kind == 'news'
+                      else title),
+            highlight(text_snippet(text, query_words))
+        )
+        for kind, pk, news_id, title, text in rows
+    ]
+    return hits[:size], len(hits) > size
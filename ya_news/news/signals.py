@@ -0,0 +1,68 @@
+"""
+Синхронизация поискового индекса и статистики новостей с новостями и
+комментариями.
+"""
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import search
+from .models import Comment, CommentEvent, News
+
+
+@receiver(post_save, sender=News)
+def index_news(sender, instance, using, **kwargs):
+    search.index_news([instance], using)
+
+
+@receiver(pre_delete, sender=News)
+def unindex_news_comments(sender, instance, using, **kwargs):
+    """
+    Комментарии удаляются каскадом, минуя Comment.delete(), поэтому их
+    записи убираются здесь, пачками по id.
+    """
+    search.unindex(
+        search.COMMENT_TABLE,
+        list(Comment.objects.using(using).filter(
+            news=instance
+        ).values_list('pk', flat=True)),
+        using
+    )
+
+
+@receiver(post_delete, sender=News)
+def unindex_news(sender, instance, using, **kwargs):
+    search.unindex(search.NEWS_TABLE, [instance.pk], using)
+
+
+@receiver(post_save, sender=Comment)
+def index_comment(sender, instance, using, created, **kwargs):
+    # Новый комментарий на модерации в индексе ещё не бывал.
+    if created and not instance.is_published:
+        return
+    search.index_comments([instance], using)
+
+
+@receiver(pre_delete, sender=settings.AUTH_USER_MODEL)
+def remember_author_comments(sender, instance, using, **kwargs):
+    """
+    Комментарии автора удаляются каскадом, минуя Comment.delete(),
+    поэтому пары (id комментария, id новости) запоминаются до удаления.
+    """
+    instance._deleted_comments = list(
+        Comment.objects.using(using).filter(
+            author=instance
+        ).values_list('pk', 'news_id')
+    )
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_author_comments(sender, instance, using, **kwargs):
+    rows = getattr(instance, '_deleted_comments', None)
+    if not rows:
+        return
+    News.objects.using(using).filter(
+        pk__in={news_id for _, news_id in rows}
+    ).refresh_comment_stats()
+    search.unindex(search.COMMENT_TABLE, [pk for pk, _ in rows], using)
+    CommentEvent.objects.using(using).record(CommentEvent.Kind.DELETED, rows)
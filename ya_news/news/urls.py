@@ -1,16 +1,51 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, async_views, feeds, views
 
 app_name = 'news'
 
+if settings.ASYNC_VIEWS:
+    news_list = async_views.news_list
+    news_detail = async_views.news_detail
+    news_events = async_views.news_events
+else:
+    news_list = views.NewsList.as_view()
+    news_detail = views.NewsDetailView.as_view()
+    news_events = views.NewsEvents.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list, name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('feed/rss/', feeds.NewsFeed(), name='rss'),
+    path('feed/atom/', feeds.AtomNewsFeed(), name='atom'),
+    path('news/<int:pk>/', news_detail, name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsComments.as_view(),
+        name='comments'
+    ),
+    path('news/<int:pk>/events/', news_events, name='events'),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path('api/news/', api.NewsListApi.as_view(), name='api-news'),
+    path(
+        'api/news/<int:pk>/',
+        api.NewsDetailApi.as_view(),
+        name='api-news-detail'
+    ),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.NewsCommentsApi.as_view(),
+        name='api-comments'
+    ),
+    path(
+        'api/comments/<int:pk>/',
+        api.CommentApi.as_view(),
+        name='api-comment'
+    ),
 ]
@@ -1,14 +1,94 @@
+from datetime import timedelta
+from hashlib import md5
+from time import time
+
 from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.db.models import OuterRef, Subquery
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
+from django.template.loader import render_to_string
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
+from . import events
+from .cache import page_cache, page_key
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import comments_page
+from .routers import ReplicaReadMixin, replica_alias
+from .search import search
+
+
+def news_updated(request, pk):
+    """
+    Время последнего изменения новости или её комментариев.
+
+    Комментарий на модерации не меняет новость, но виден своему автору,
+    поэтому для вошедшего пользователя учитывается и его последний
+    такой комментарий - тем же запросом.
+    """
+    if not hasattr(request, '_news_updated'):
+        columns = ['updated']
+        news = News.objects.filter(pk=pk)
+        if request.user.is_authenticated:
+            news = news.annotate(own_pending=Subquery(
+                Comment.objects.filter(
+                    news=OuterRef('pk'),
+                    author=request.user,
+                    status=Comment.Status.PENDING
+                ).order_by('-updated').values('updated')[:1]
+            ))
+            columns.append('own_pending')
+        row = news.values_list(*columns).first()
+        request._news_updated = row and max(filter(None, row))
+    return request._news_updated
+
+
+def news_last_modified(request, pk):
+    """
+    Last-Modified только для анонимов и не раньше чем через секунду
+    после изменения.
 
+    Страница вошедшего пользователя зависит от него самого, а это
+    различает только ETag. Дата HTTP точна до секунды, так что вторая
+    правка в ту же секунду с If-Modified-Since была бы не видна.
+    """
+    if request.user.is_authenticated:
+        return None
+    updated = news_updated(request, pk)
+    if updated is None or timezone.now() - updated < timedelta(seconds=1):
+        return None
+    return updated
 
-class NewsList(generic.ListView):
+
+def news_etag(request, pk):
+    """
+    Страница зависит ещё от пользователя и курсора комментариев, а
+    у вошедшего - и от CSRF-токена в форме комментария: вход меняет
+    токен, и страница со старым давала бы 403 на отправку.
+    """
+    updated = news_updated(request, pk)
+    if updated is None:
+        return None
+    csrf = ''
+    if request.user.is_authenticated:
+        # get_token заводит cookie, если его ещё нет, чтобы ETag первой
+        # страницы совпал со следующими.
+        get_token(request)
+        csrf = request.META['CSRF_COOKIE']
+    return md5(
+        f'{updated.isoformat()}:{request.user.pk}:{csrf}:'
+        f'{request.GET.get("after", "")}'.encode()
+    ).hexdigest()
+
+
+class NewsList(ReplicaReadMixin, generic.ListView):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
@@ -17,23 +97,57 @@ class NewsList(generic.ListView):
         """
         Выводим только несколько последних новостей.
 
-        Их количество определяется в настройках проекта.
+        Их количество определяется в настройках проекта. Число комментариев
+        хранится в самой новости, комментарии не загружаются.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
+    def get(self, request, *args, **kwargs):
+        """Анонимам отдаём одну и ту же страницу из кеша."""
+        if request.user.is_authenticated:
+            return super().get(request, *args, **kwargs)
+        key = page_key('home')
+        content = page_cache().get(key)
+        if content is not None:
+            return HttpResponse(content)
+        # Реплика может ещё не догнать правку, после которой сменилась
+        # версия: такую страницу храним не дольше отставания реплик.
+        timeout = (
+            settings.REPLICA_PIN_SECONDS if replica_alias.get()
+            else DEFAULT_TIMEOUT
+        )
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            lambda response: page_cache().set(key, response.content, timeout)
+        )
+        return response
 
-class NewsDetail(generic.DetailView):
+
+class CommentsPageMixin:
+    """
+    Первая страница комментариев новости self.object и начало потока
+    событий - и для страницы новости, и для формы с ошибками.
+    """
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments'], context['next_cursor'] = comments_page(
+            self.object.comment_set.visible_to(
+                self.request.user
+            ).select_related('author'),
+            self.request.GET.get('after')
+        )
+        # Поток событий начнётся с изменений после отрисовки страницы.
+        context['events_since'] = int(time())
+        return context
+
+
+class NewsDetail(CommentsPageMixin, generic.DetailView):
     model = News
     template_name = 'news/detail.html'
 
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -44,6 +158,7 @@ class NewsDetail(generic.DetailView):
 
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -56,9 +171,11 @@ class NewsComment(
         return super().post(request, *args, **kwargs)
 
     def form_valid(self, form):
+        """Комментарий публикует фоновая модерация, здесь только вставка."""
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
+        comment.status = Comment.Status.PENDING
         comment.save()
         return super().form_valid(form)
 
@@ -67,8 +184,13 @@ class NewsComment(
         return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
 
 
-class NewsDetailView(generic.View):
+class NewsDetailView(ReplicaReadMixin, generic.View):
 
+    @method_decorator(
+        condition(
+            etag_func=news_etag, last_modified_func=news_last_modified
+        )
+    )
     def get(self, request, *args, **kwargs):
         view = NewsDetail.as_view()
         return view(request, *args, **kwargs)
@@ -78,6 +200,48 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class NewsComments(generic.View):
+    """Следующая страница комментариев для кнопки «Показать ещё»."""
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News.objects.only('pk'), pk=kwargs['pk'])
+        comments, next_cursor = comments_page(
+            news.comment_set.visible_to(request.user).select_related(
+                'author'
+            ),
+            request.GET.get('after')
+        )
+        html = render_to_string(
+            'news/includes/comments.html',
+            {'comments': comments},
+            request=request
+        )
+        return JsonResponse({'html': html, 'next': next_cursor})
+
+
+class NewsEvents(generic.View):
+    """
+    События комментариев новости для WSGI, см. events.py.
+
+    Отвечает сразу тем, что накопилось, и просит браузер спросить снова
+    через COMMENT_EVENTS_WSGI_RETRY_MS: поток сервера не ждёт событий.
+    """
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News.objects.only('pk'), pk=kwargs['pk'])
+        messages, after = events.read(
+            request, news.pk, events.start_id(request, news.pk)
+        )
+        response = HttpResponse(
+            events.body(
+                messages, after, settings.COMMENT_EVENTS_WSGI_RETRY_MS
+            ),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
@@ -90,7 +254,9 @@ class CommentBase(LoginRequiredMixin):
 
     def get_queryset(self):
         """Пользователь может работать только со своими комментариями."""
-        return self.model.objects.filter(author=self.request.user)
+        return self.model.objects.select_related('news').filter(
+            author=self.request.user
+        )
 
 
 class CommentUpdate(CommentBase, generic.UpdateView):
@@ -98,7 +264,30 @@ class CommentUpdate(CommentBase, generic.UpdateView):
     template_name = 'news/edit.html'
     form_class = CommentForm
 
+    def form_valid(self, form):
+        """Изменённый текст заново проходит модерацию."""
+        form.instance.status = Comment.Status.PENDING
+        return super().form_valid(form)
+
 
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class NewsSearch(generic.TemplateView):
+    """Поиск по новостям и опубликованным комментариям."""
+    template_name = 'news/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Неверный номер страницы.')
+        if page < 1:
+            raise Http404('Неверный номер страницы.')
+        hits, has_next = search(query, page)
+        context.update(query=query, page=page, hits=hits, has_next=has_next)
+        return context
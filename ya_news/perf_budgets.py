@@ -0,0 +1,81 @@
+"""
+Бюджеты SQL-запросов и времени ответа для страниц YaNews.
+
+Плагин pytest: подключается в conftest.py и даёт тестам фикстуры
+scale (размер данных) и assert_within_budget. Все бюджеты собраны в
+таблице BUDGETS, размеры данных - в SCALES. Самые большие размеры
+долго наполняются, поэтому по умолчанию проверяются размеры не больше
+BUDGET_MAX_SCALE из переменной окружения.
+
+Число запросов проверяется всегда. Время зависит от машины, поэтому
+его бюджеты проверяются, только если задан множитель
+BUDGET_TIME_FACTOR (например, 1 на своей машине и 5 на общем CI).
+"""
+import os
+from collections import namedtuple
+from time import perf_counter
+
+import pytest
+
+Budget = namedtuple('Budget', ('queries', 'sql_ms', 'response_ms'))
+
+SCALES = (10, 1_000, 100_000)
+MAX_SCALE = int(os.getenv('BUDGET_MAX_SCALE', 1_000))
+TIME_FACTOR = float(os.getenv('BUDGET_TIME_FACTOR', 0))
+
+# Число запросов включает чтение сессии и пользователя, а для
+# NewsDetailView ещё и проверку условного GET.
+BUDGETS = {
+    'NewsList': Budget(queries=3, sql_ms=50, response_ms=300),
+    'NewsDetailView': Budget(queries=5, sql_ms=50, response_ms=300),
+    'CommentUpdate': Budget(queries=3, sql_ms=50, response_ms=300),
+    'CommentDelete': Budget(queries=3, sql_ms=50, response_ms=300),
+}
+
+
+def check_timing(name, captured, response_ms):
+    budget = BUDGETS[name]
+    sql_ms = sum(
+        float(query['time']) for query in captured.captured_queries
+    ) * 1000
+    assert sql_ms <= budget.sql_ms * TIME_FACTOR, (
+        f'{name}: SQL {sql_ms:.1f} мс, бюджет {budget.sql_ms} мс'
+    )
+    assert response_ms <= budget.response_ms * TIME_FACTOR, (
+        f'{name}: ответ {response_ms:.1f} мс, '
+        f'бюджет {budget.response_ms} мс'
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if 'scale' in metafunc.fixturenames:
+        metafunc.parametrize(
+            'scale',
+            [
+                pytest.param(
+                    scale,
+                    marks=pytest.mark.skipif(
+                        scale > MAX_SCALE,
+                        reason=f'BUDGET_MAX_SCALE={MAX_SCALE}'
+                    )
+                )
+                for scale in SCALES
+            ]
+        )
+
+
+@pytest.fixture
+def assert_within_budget(django_assert_max_num_queries):
+    """Выполняет запрос к странице и сверяет его с бюджетом из BUDGETS."""
+    def check(name, request):
+        start = perf_counter()
+        with django_assert_max_num_queries(
+            BUDGETS[name].queries
+        ) as captured:
+            response = request()
+        if TIME_FACTOR:
+            check_timing(
+                name, captured, (perf_counter() - start) * 1000
+            )
+        return response
+    return check
@@ -0,0 +1,155 @@
+"""
+Общие настройки YaNews; dev.py и prod.py дополняют их, а выбирает
+между ними settings/__init__.py.
+"""
+import os
+from pathlib import Path
+
+from django.urls import reverse_lazy
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['localhost', '127.0.0.1']
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'news.apps.NewsConfig',
+]
+
+MIDDLEWARE = [
+    'news.profiling.SqlProfilingMiddleware',
+    'news.routers.ReplicaPinMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yanews.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yanews.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Реплики только для чтения, см. news.routers: пути к файлам SQLite
+# через запятую в DATABASE_REPLICAS, алиасы replica1, replica2 и т. д.
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1
+):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'NAME': name}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['news.routers.ReplicaRouter']
+
+# Сколько секунд после изменяющего запроса клиент читает из основной
+# базы.
+REPLICA_PIN_SECONDS = 5
+
+# Для нескольких процессов PAGE_CACHE_BACKEND должен быть общим, например
+# django.core.cache.backends.filebased.FileBasedCache с каталогом в
+# PAGE_CACHE_LOCATION.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': os.getenv(
+            'PAGE_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('PAGE_CACHE_LOCATION', 'yanews-pages'),
+        'TIMEOUT': 60 * 60,
+    },
+}
+
+PAGE_CACHE_ALIAS = 'pages'
+
+
+AUTH_PASSWORD_VALIDATORS = []
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'Europe/Moscow'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGIN_URL = reverse_lazy('users:login')
+
+LOGIN_REDIRECT_URL = reverse_lazy('news:home')
+
+NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_COUNT_ON_DETAIL_PAGE = 20
+
+SEARCH_RESULTS_ON_PAGE = 20
+
+# Асинхронные варианты страниц для ASGI-сервера, включаются ASYNC_VIEWS=1.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == '1'
+
+# Файл с дополнительными запрещёнными словами, по одному в строке.
+BAD_WORDS_FILE = os.getenv('BAD_WORDS_FILE')
+
+# Правила фоновой модерации комментариев, см. news.pipeline.
+COMMENT_MODERATION_RULES = (
+    'news.pipeline.bad_words_rule',
+)
+
+# Поток событий комментариев, см. news.events: сколько секунд хранятся
+# события и как часто удаляются старые, как часто поток под ASGI
+# проверяет новые и сколько ждёт их одно соединение, и через сколько
+# миллисекунд браузер спрашивает снова под WSGI, где поток не держится.
+COMMENT_EVENTS_KEEP = 60 * 60
+COMMENT_EVENTS_PRUNE_EVERY = 60
+COMMENT_EVENTS_POLL = 1.0
+COMMENT_EVENTS_STREAM_SECONDS = 30
+COMMENT_EVENTS_WSGI_RETRY_MS = 5000
+
+# Профилирование SQL, см. news.profiling: доля профилируемых запросов
+# (0 - выключено), порог медленного запроса и журнал медленных запросов.
+SQL_PROFILING_RATE = float(os.getenv('SQL_PROFILING_RATE', 0))
+SQL_PROFILING_SLOW_MS = 500
+SQL_PROFILING_LOG = BASE_DIR / 'slow_requests.jsonl'
+SQL_PROFILING_LOG_BYTES = 10 * 1024 * 1024
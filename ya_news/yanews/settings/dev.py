@@ -0,0 +1,4 @@
+"""Настройки для разработки."""
+from .base import *  # noqa: F401,F403
+
+DEBUG = True
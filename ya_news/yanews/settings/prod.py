@@ -0,0 +1,57 @@
+"""
+Настройки YaNews для боевого сервера (DJANGO_ENV=prod).
+
+Секретный ключ и разрешённые хосты берутся из окружения. Шаблоны
+читаются и компилируются один раз на процесс (cached.Loader); после
+правки шаблона процесс нужно перезапустить.
+
+Соединение с базой живёт CONN_MAX_AGE секунд и переиспользуется
+следующими запросами, а PRAGMA из yanews.sqlite настраивают SQLite на
+конкурентную запись: журнал WAL не блокирует чтение во время записи,
+synchronous=NORMAL в режиме WAL не теряет целостность базы и
+синхронизирует диск только на контрольных точках, mmap читает файл
+базы без копирования, а busy_timeout ждёт освобождения блокировки
+вместо ошибки database is locked.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, TEMPLATES
+
+DEBUG = False
+
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+
+ALLOWED_HOSTS = os.getenv('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+DATABASES = {
+    alias: {
+        **database,
+        'ENGINE': 'yanews.sqlite',
+        'CONN_MAX_AGE': 60,
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'busy_timeout': 5000,
+            },
+        },
+    }
+    for alias, database in DATABASES.items()
+}
+
+TEMPLATES = [{
+    **TEMPLATES[0],
+    'APP_DIRS': False,
+    'OPTIONS': {
+        **TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'django.template.loaders.cached.Loader',
+            [
+                'django.template.loaders.filesystem.Loader',
+                'django.template.loaders.app_directories.Loader',
+            ],
+        )],
+    },
+}]
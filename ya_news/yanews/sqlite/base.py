@@ -0,0 +1,22 @@
+"""
+SQLite с PRAGMA, которые выполняются на каждом новом соединении.
+
+Подключается как ENGINE с OPTIONS['pragmas'] = {'имя': значение};
+остальные OPTIONS, как обычно, уходят в sqlite3.connect.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop('pragmas', None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        pragmas = self.settings_dict['OPTIONS'].get('pragmas', {})
+        for name, value in pragmas.items():
+            connection.execute(f'PRAGMA {name} = {value}')
+        return connection
@@ -0,0 +1,67 @@
+"""
+Сравнение поиска по индексу с поиском через icontains.
+
+Работает с базой из настроек проекта, наполненной командой seed;
+ищет по заметкам самого активного автора. Запуск из каталога ya_note:
+
+    python manage.py seed --notes 200000
+    python -m benchmarks.search [--repeat 20] [запрос ...]
+"""
+import argparse
+import os
+from functools import reduce
+from operator import and_
+from timeit import timeit
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanote.settings')
+django.setup()
+
+from django.db.models import Count, Q  # noqa: E402
+
+from notes.models import Note  # noqa: E402
+from notes.search import search_notes  # noqa: E402
+
+# В словаре seed всего 15 слов, поэтому первые запросы находят почти
+# все заметки и упираются в ранжирование, а последний - ни одной.
+QUERIES = ('молоко', 'купить молоко', 'рец', 'отчёт встреча', 'телескоп')
+
+
+def scan_search(author, query, page_size=20):
+    """Поиск без индекса: LIKE по всем заметкам автора."""
+    condition = reduce(and_, (
+        Q(title__icontains=word) | Q(text__icontains=word)
+        for word in query.split()
+    ))
+    return list(
+        Note.objects.filter(author=author).filter(condition).only(
+            'id', 'slug', 'title'
+        )[:page_size]
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('queries', nargs='*', default=QUERIES)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    top = Note.objects.values('author').annotate(
+        total=Count('pk')
+    ).order_by('-total').first()
+    if not top:
+        parser.error('База пуста, сначала выполните manage.py seed.')
+    author = Note.author.field.related_model.objects.get(pk=top['author'])
+    print(f'Автор {author}, заметок: {top["total"]}')
+    for query in args.queries:
+        for name, search in (
+            ('индекс', lambda: search_notes(author, query)),
+            ('icontains', lambda: scan_search(author, query)),
+        ):
+            seconds = timeit(search, number=args.repeat) / args.repeat
+            print(f'{query!r:>24} {name:>10}: {seconds * 1000:8.2f} мс')
+
+
+if __name__ == '__main__':
+    main()
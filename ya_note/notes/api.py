@@ -0,0 +1,293 @@
+"""
+JSON API заметок.
+
+Данные проверяет та же NoteForm, что и на HTML-страницах, а права
+те же, что у NoteBase: пользователь видит и меняет только свои
+заметки. Отдельные заметки адресуются по slug, в пакетном запросе - по
+id. Пакетный запрос создаёт, изменяет и удаляет заметки в одной
+транзакции: при любой ошибке не меняется ничего.
+
+Интеграции входят по ключу из команды issue_api_token в заголовке
+Authorization: Token <ключ>. Такой запрос браузер сам не отправит,
+поэтому CSRF для него не проверяется. Запросы с сессией браузера
+проверяются как формы: изменяющий запрос должен нести заголовок
+X-CSRFToken со значением cookie csrftoken.
+"""
+import json
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.decorators import method_decorator
+from django.views import generic
+from django.views.decorators.csrf import csrf_exempt
+
+from .forms import WARNING, NoteForm
+from .jsonl import FIELDS
+from .models import ApiToken, Note, assign_unique_slugs
+from .views import NoteBase
+
+TOKEN_SCHEME = 'Token'
+
+
+class ApiError(Exception):
+
+    def __init__(self, status, errors):
+        super().__init__(errors)
+        self.status = status
+        self.errors = errors
+
+
+def note_data(note):
+    return {
+        'id': note.pk,
+        'title': note.title,
+        'text': note.text,
+        'slug': note.slug,
+        'updated': note.updated.isoformat(),
+    }
+
+
+def form_errors(form):
+    return {field: list(messages) for field, messages in form.errors.items()}
+
+
+def slug_taken(slug):
+    return {'slug': [slug + WARNING]}
+
+
+def check_csrf(request):
+    """Проверка CsrfViewMiddleware для запроса с сессией браузера."""
+    response = CsrfViewMiddleware(lambda request: None).process_view(
+        request, None, (), {}
+    )
+    if response is not None:
+        raise ApiError(403, {'__all__': [
+            'Нет CSRF-токена: передайте X-CSRFToken или войдите по ключу.'
+        ]})
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class NoteApiBase(NoteBase, generic.View):
+    """Ошибки отдаются в JSON: {"errors": ...} с подходящим статусом."""
+    http_method_names = ('get', 'post', 'put', 'patch', 'delete')
+
+    def handle_no_permission(self):
+        return JsonResponse(
+            {'errors': {'__all__': ['Нужно войти в систему.']}}, status=401
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            self.authenticate(request)
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse({'errors': error.errors}, status=error.status)
+
+    @staticmethod
+    def authenticate(request):
+        """Пользователь по ключу из Authorization, иначе - из сессии."""
+        header = request.headers.get('Authorization')
+        if header is None:
+            check_csrf(request)
+            return
+        scheme, _, key = header.partition(' ')
+        user = None
+        if scheme == TOKEN_SCHEME:
+            user = ApiToken.objects.user_for(key)
+        if user is None:
+            raise ApiError(401, {'__all__': ['Неверный ключ API.']})
+        request.user = user
+
+    def payload(self):
+        try:
+            data = json.loads(self.request.body)
+        except ValueError as error:
+            raise ApiError(400, {'__all__': [f'Некорректный JSON: {error}']})
+        if not isinstance(data, dict):
+            raise ApiError(
+                400, {'__all__': ['Неверная структура запроса.']}
+            )
+        return data
+
+    def note_form(self, data, note=None):
+        """NoteForm по данным; недостающие поля берутся из заметки."""
+        if note is not None:
+            data = {**{field: getattr(note, field) for field in FIELDS},
+                    **data}
+        form = NoteForm(data=data, instance=note)
+        form.instance.author = self.request.user
+        return form
+
+    def save(self, form, status):
+        if not form.is_valid():
+            raise ApiError(400, form_errors(form))
+        try:
+            with transaction.atomic():
+                note = form.save()
+        except IntegrityError:
+            if not form.instance.slug_is_taken():
+                raise
+            raise ApiError(409, slug_taken(form.instance.slug))
+        return JsonResponse(note_data(note), status=status)
+
+
+class NotesApi(NoteApiBase):
+    """Список заметок страницами по id и создание заметки."""
+    http_method_names = ('get', 'post')
+
+    def get(self, request, *args, **kwargs):
+        try:
+            after = int(request.GET.get('after', 0))
+        except ValueError:
+            raise ApiError(400, {'after': ['Ожидается число.']})
+        size = settings.NOTES_PAGE_SIZE
+        # Лишняя заметка только показывает, что есть следующая страница.
+        notes = list(
+            self.get_queryset().filter(pk__gt=after).order_by(
+                'pk'
+            )[:size + 1]
+        )
+        return JsonResponse({
+            'results': [note_data(note) for note in notes[:size]],
+            'next': notes[size - 1].pk if len(notes) > size else None,
+        })
+
+    def post(self, request, *args, **kwargs):
+        return self.save(self.note_form(self.payload()), status=201)
+
+
+class NoteApi(NoteApiBase):
+    """Одна заметка по slug."""
+    http_method_names = ('get', 'put', 'patch', 'delete')
+
+    def get_object(self):
+        note = self.get_queryset().filter(slug=self.kwargs['slug']).first()
+        if note is None:
+            raise ApiError(404, {'__all__': ['Заметка не найдена.']})
+        return note
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(note_data(self.get_object()))
+
+    def put(self, request, *args, **kwargs):
+        form = NoteForm(data=self.payload(), instance=self.get_object())
+        return self.save(form, status=200)
+
+    def patch(self, request, *args, **kwargs):
+        form = self.note_form(self.payload(), self.get_object())
+        return self.save(form, status=200)
+
+    def delete(self, request, *args, **kwargs):
+        self.get_object().delete()
+        return HttpResponse(status=204)
+
+
+class NotesBatchApi(NoteApiBase):
+    """
+    Пакетные изменения одним запросом и одной транзакцией.
+
+    Тело запроса: {"create": [{...}], "update": [{"id": 1, ...}],
+    "delete": [2, 3]}; каждая часть необязательна. Сначала удаляются
+    заметки, потом изменяются и в конце создаются, поэтому
+    освободившийся slug можно сразу занять. Ошибки возвращаются по
+    номерам элементов каждой части.
+    """
+    http_method_names = ('post',)
+
+    def post(self, request, *args, **kwargs):
+        data = self.payload()
+        errors = {}
+        creates = self.check_forms(
+            errors, 'create', [self.note_form(item) for item in
+                               self.items(data, 'create', dict)]
+        )
+        updates = self.check_forms(
+            errors, 'update', self.update_forms(errors, data)
+        )
+        deletes = self.items(data, 'delete', int)
+        if errors:
+            raise ApiError(400, errors)
+        try:
+            with transaction.atomic():
+                _, deleted = self.get_queryset().filter(
+                    pk__in=deletes
+                ).delete()
+                updated = [form.save() for form in updates]
+                created = self.create(creates)
+        except IntegrityError:
+            raise ApiError(409, {'__all__': [
+                'Один из slug уже занят, изменения не сохранены.'
+            ]})
+        return JsonResponse({
+            'created': [note_data(note) for note in created],
+            'updated': [note_data(note) for note in updated],
+            'deleted': deleted.get(Note._meta.label, 0),
+        })
+
+    @staticmethod
+    def items(data, part, item_type):
+        items = data.get(part, [])
+        if not isinstance(items, list) or not all(
+            isinstance(item, item_type) for item in items
+        ):
+            raise ApiError(400, {part: ['Неверная структура запроса.']})
+        return items
+
+    def update_forms(self, errors, data):
+        items = self.items(data, 'update', dict)
+        ids = [item.get('id') for item in items]
+        notes = self.get_queryset().in_bulk(
+            [pk for pk in ids if isinstance(pk, int)]
+        )
+        forms = []
+        for index, (pk, item) in enumerate(zip(ids, items)):
+            note = notes.get(pk) if isinstance(pk, int) else None
+            if note is None:
+                errors.setdefault('update', {})[index] = {
+                    'id': ['Заметка не найдена.']
+                }
+                forms.append(None)
+                continue
+            forms.append(self.note_form(
+                {field: item[field] for field in FIELDS if field in item},
+                note
+            ))
+        return forms
+
+    @staticmethod
+    def check_forms(errors, part, forms):
+        for index, form in enumerate(forms):
+            if form is not None and not form.is_valid():
+                errors.setdefault(part, {})[index] = form_errors(form)
+        return forms
+
+    def create(self, forms):
+        """
+        Заметки создаются одним bulk_create.
+
+        Пустые slug подбираются как при импорте, а занятые заданные
+        slug - ошибка, как и при создании одной заметки.
+        """
+        notes = [form.instance for form in forms]
+        if not notes:
+            return []
+        given = Counter(note.slug for note in notes if note.slug)
+        taken = set(
+            Note.objects.filter(slug__in=given).values_list('slug', flat=True)
+        ) | {slug for slug, count in given.items() if count > 1}
+        if taken:
+            raise ApiError(409, {'create': {
+                index: slug_taken(note.slug)
+                for index, note in enumerate(notes) if note.slug in taken
+            }})
+        # Заданные slug идут первыми, чтобы подобранные их не заняли.
+        assign_unique_slugs(sorted(notes, key=lambda note: not note.slug))
+        Note.objects.bulk_create(notes)
+        # SQLite не возвращает id после bulk_create, а slug уникален.
+        created = self.get_queryset().in_bulk(
+            [note.slug for note in notes], field_name='slug'
+        )
+        return [created[note.slug] for note in notes]
@@ -0,0 +1,42 @@
+"""
+Асинхронные список заметок и страница заметки для ASGI.
+
+Под ASGI синхронные представления Django выполняются по очереди в
+одном общем потоке, и долгий список одного пользователя задерживал бы
+страницы всех остальных. Здесь представление целиком, с проверкой
+входа и отрисовкой шаблона, выполняется в пуле потоков
+(thread_sensitive=False). Подключаются в urls.py, только если сервер
+запущен с переменной окружения ASYNC_VIEWS=1.
+"""
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from . import views
+
+
+def async_view(view_class):
+    """Асинхронная обёртка над синхронным CBV."""
+    view = view_class.as_view()
+
+    def respond(request, *args, **kwargs):
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+        finally:
+            # Соединения с базой в пуле живут по потокам; закрываем
+            # их так же, как обработчик запроса закрывает свои.
+            close_old_connections()
+
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(respond, thread_sensitive=False)(
+            request, *args, **kwargs
+        )
+
+    wrapper.view_class = view_class
+    return wrapper
+
+
+notes_list = async_view(views.NotesList)
+note_detail = async_view(views.NoteDetail)
@@ -0,0 +1,67 @@
+"""
+Кеш пользователей для проверки входа.
+
+AuthenticationMiddleware на каждом запросе ищет пользователя по id из
+сессии. CachedModelBackend держит найденного пользователя в кеше
+USER_CACHE_ALIAS до его TIMEOUT. Запись в кеше удаляется при выходе и
+при любом сохранении или удалении пользователя, в том числе при смене
+пароля. Удаление видят все процессы, которые делят этот кеш: в prod
+он файловый, а в памяти процесса (dev) правки из другого процесса
+видны самое позднее через TIMEOUT.
+
+Пароль в кеше тоже есть, поэтому после его смены старые сессии
+перестают проходить проверку хеша, как и без кеша.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model, user_logged_out
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+User = get_user_model()
+
+
+def user_cache():
+    return caches[settings.USER_CACHE_ALIAS]
+
+
+def user_key(user_id):
+    return f'notes:user:{user_id}'
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        user = user_cache().get(user_key(user_id))
+        if user is None:
+            # Реплика может отставать от смены пароля, поэтому в кеш
+            # попадает только строка из основной базы.
+            try:
+                user = User._default_manager.db_manager(
+                    DEFAULT_DB_ALIAS
+                ).get(pk=user_id)
+            except User.DoesNotExist:
+                return None
+            user_cache().set(user_key(user_id), user)
+        return user if self.user_can_authenticate(user) else None
+
+
+def forget_user(user_id):
+    user_cache().delete(user_key(user_id))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, using, **kwargs):
+    # Удаляем сразу и ещё раз после фиксации, чтобы параллельный запрос
+    # не успел вернуть в кеш старую строку.
+    forget_user(instance.pk)
+    transaction.on_commit(lambda: forget_user(instance.pk), using=using)
+
+
+@receiver(user_logged_out)
+def user_left(sender, request, user, **kwargs):
+    if user is not None:
+        forget_user(user.pk)
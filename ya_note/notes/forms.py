@@ -1,5 +1,3 @@
-from pytils.translit import slugify
-
 from django import forms
 from django.core.exceptions import ValidationError
 
@@ -15,15 +13,16 @@ class NoteForm(forms.ModelForm):
         model = Note
         fields = ('title', 'text', 'slug')
 
-    def clean_slug(self):
-        """Обрабатывает случай, если slug не уникален."""
-        cleaned_data = super().clean()
-        slug = cleaned_data.get('slug')
-        if not slug:
-            title = cleaned_data.get('title')
-            slug = slugify(title)[:100]
-        if Note.objects.filter(
-                slug=slug
-        ).exclude(id=self.instance.pk).exists():
-            raise ValidationError(slug + WARNING)
-        return slug
+    def validate_unique(self):
+        """
+        Уникальность slug проверяет база данных при сохранении.
+
+        Отдельный запрос заранее всё равно не спасает от гонки, а пустой
+        slug модель подберёт сама.
+        """
+        exclude = self._get_validation_exclusions()
+        exclude.append('slug')
+        try:
+            self.instance.validate_unique(exclude=exclude)
+        except ValidationError as error:
+            self.add_error(None, error)
@@ -0,0 +1,100 @@
+"""
+Выгрузка и загрузка заметок в формате JSON Lines.
+
+Одна строка - одна заметка. И выгрузка, и загрузка работают потоком,
+поэтому расход памяти не зависит от числа заметок.
+"""
+import json
+import tempfile
+from itertools import islice
+
+from django.db import IntegrityError, transaction
+
+from .forms import NoteForm
+from .models import SLUG_ATTEMPTS, Note, assign_unique_slugs
+
+FIELDS = ('title', 'text', 'slug')
+CHUNK_SIZE = 2_000
+BATCH_SIZE = 1_000
+SPOOL_SIZE = 1024 * 1024
+
+
+def dump_notes(queryset, chunk_size=CHUNK_SIZE):
+    """Строки JSONL; заметки читаются из БД порциями по chunk_size."""
+    for note in queryset.order_by('pk').values(*FIELDS).iterator(
+            chunk_size=chunk_size
+    ):
+        yield json.dumps(note, ensure_ascii=False) + '\n'
+
+
+def chunks(lines, size=CHUNK_SIZE):
+    """Строки, склеенные по size: меньше объектов и отправок клиенту."""
+    lines = iter(lines)
+    while chunk := ''.join(islice(lines, size)):
+        yield chunk
+
+
+def spool(lines, max_size=SPOOL_SIZE):
+    """
+    Строки во временном файле, открытом с начала.
+
+    До max_size байт файл живёт в памяти, дальше уходит на диск.
+    """
+    file = tempfile.SpooledTemporaryFile(max_size=max_size)
+    for chunk in chunks(lines):
+        file.write(chunk.encode())
+    file.seek(0)
+    return file
+
+
+def parse_notes(lines, author, errors):
+    """Проверяет строки формой заметки, ошибки складывает в errors."""
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as error:
+            errors.append((number, str(error)))
+            continue
+        form = NoteForm(data=data if isinstance(data, dict) else {})
+        if not form.is_valid():
+            errors.append((number, ' '.join(
+                f'{field}: {" ".join(messages)}'
+                for field, messages in form.errors.items()
+            )))
+            continue
+        form.instance.author = author
+        yield form.instance
+
+
+def save_batch(notes):
+    """
+    bulk_create с уникальными slug.
+
+    Если параллельная вставка заняла один из slug, пачка откатывается
+    и slug подбираются заново.
+    """
+    requested = [note.slug for note in notes]
+    for _ in range(SLUG_ATTEMPTS - 1):
+        assign_unique_slugs(notes)
+        try:
+            with transaction.atomic():
+                return Note.objects.bulk_create(notes)
+        except IntegrityError:
+            for note, slug in zip(notes, requested):
+                note.slug = slug
+    assign_unique_slugs(notes)
+    return Note.objects.bulk_create(notes)
+
+
+def load_notes(lines, author, batch_size=BATCH_SIZE):
+    """Загружает заметки пачками; возвращает число созданных и ошибки."""
+    errors = []
+    notes = parse_notes(lines, author, errors)
+    created = 0
+    while True:
+        batch = list(islice(notes, batch_size))
+        if not batch:
+            return created, errors
+        created += len(save_batch(batch))
@@ -0,0 +1,33 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.jsonl import CHUNK_SIZE, dump_notes
+from notes.models import Note
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в JSON Lines.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            '--output',
+            default='-',
+            help='Файл для выгрузки; по умолчанию стандартный вывод.',
+        )
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, username, output, chunk_size, **options):
+        try:
+            author = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        lines = dump_notes(Note.objects.filter(author=author), chunk_size)
+        if output == '-':
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(output, 'w', encoding='utf-8') as file:
+            file.writelines(lines)
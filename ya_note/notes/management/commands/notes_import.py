@@ -0,0 +1,39 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.jsonl import BATCH_SIZE, load_notes
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки пользователя из JSON Lines. Занятые slug '
+        'получают числовой суффикс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument(
+            'path',
+            nargs='?',
+            default='-',
+            help='Файл с заметками; по умолчанию стандартный ввод.',
+        )
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, username, path, batch_size, **options):
+        try:
+            author = User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise CommandError(f'Пользователь {username} не найден.')
+        if path == '-':
+            created, errors = load_notes(sys.stdin, author, batch_size)
+        else:
+            with open(path, encoding='utf-8') as file:
+                created, errors = load_notes(file, author, batch_size)
+        for number, error in errors:
+            self.stderr.write(f'Строка {number}: {error}')
+        self.stdout.write(self.style.SUCCESS(f'Загружено заметок: {created}'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from notes.models import Note
+from notes.search import BATCH_SIZE, get_index
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит поисковый индекс заметок. Всё делается в одной '
+        'транзакции, поэтому поиск не видит наполовину пустой индекс.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=BATCH_SIZE,
+            help='Сколько заметок читать и индексировать за раз.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        index = get_index(DEFAULT_DB_ALIAS)
+        notes = Note.objects.order_by('pk').only(
+            'id', 'author_id', 'title', 'text'
+        )
+        last_pk = 0
+        total = 0
+        with transaction.atomic():
+            index.clear()
+            while True:
+                batch = list(notes.filter(pk__gt=last_pk)[:batch_size])
+                if not batch:
+                    break
+                index.add(batch)
+                last_pk = batch[-1].pk
+                total += len(batch)
+                self.stdout.write(f'Проиндексировано заметок: {total}')
+        self.stdout.write(self.style.SUCCESS('Готово.'))
@@ -0,0 +1,140 @@
+from functools import partial
+from multiprocessing import Pool
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import Note
+
+User = get_user_model()
+
+WORDS = (
+    'купить', 'молоко', 'позвонить', 'маме', 'встреча', 'отчёт', 'идея',
+    'книга', 'фильм', 'рецепт', 'поездка', 'список', 'дела', 'план', 'код',
+)
+
+
+def batch_rng(seed, kind, batch):
+    """
+    Своя последовательность случайных чисел для каждой пачки.
+
+    Поэтому результат не зависит от числа процессов и порядка их работы.
+    """
+    return Random(f'{seed}:{kind}:{batch}')
+
+
+def sentence(rng, length):
+    return ' '.join(rng.choices(WORDS, k=length)).capitalize()
+
+
+def note_rows(seed, prefix, total, user_count, batch_size, batch):
+    """
+    Заметки идут подряд по авторам. Квадрат в распределении даёт первым
+    авторам гораздо больше заметок, как у самых активных пользователей.
+    """
+    rng = batch_rng(seed, 'notes', batch)
+    return [
+        (
+            int(user_count * (index / total) ** 2),
+            sentence(rng, rng.randint(2, 6))[:100],
+            sentence(rng, rng.randint(10, 200)),
+            f'{prefix}-{index}',
+        )
+        for index in range(
+            batch * batch_size, min((batch + 1) * batch_size, total)
+        )
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Детерминированно наполняет базу пользователями и заметками '
+        'для нагрузочных проверок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1_000)
+        parser.add_argument('--notes', type=int, default=1_000_000)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5_000)
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Процессы, генерирующие строки; вставляет всегда основной.',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='seed',
+            help='Префикс имён и slug, чтобы запускать повторно.',
+        )
+
+    def handle(self, *args, **options):
+        if options['notes'] and not options['users']:
+            raise CommandError('Для заметок нужен хотя бы один автор.')
+        self.options = options
+        self.pool = None
+        if options['workers'] > 1:
+            self.pool = Pool(options['workers'])
+        try:
+            user_ids = self.seed_users()
+            self.seed_notes(user_ids)
+        finally:
+            if self.pool:
+                self.pool.close()
+                self.pool.join()
+        self.stdout.write(self.style.SUCCESS('Готово.'))
+
+    def batches(self, func, total):
+        count = -(-total // self.options['batch_size'])
+        if self.pool:
+            return self.pool.imap(func, range(count))
+        return map(func, range(count))
+
+    def seed_users(self):
+        prefix, total = self.options['prefix'], self.options['users']
+        if User.objects.filter(username__startswith=f'{prefix}-').exists():
+            raise CommandError(
+                f'Пользователи с префиксом «{prefix}» уже есть, '
+                'для повторного запуска укажите другой --prefix.'
+            )
+        password = make_password('password', salt=prefix)
+        last_pk = User.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+        User.objects.bulk_create(
+            (
+                User(username=f'{prefix}-{index}', password=password)
+                for index in range(total)
+            ),
+            batch_size=self.options['batch_size'],
+        )
+        self.stdout.write(f'Пользователей: {total}')
+        return list(
+            User.objects.filter(pk__gt=last_pk).order_by('pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def seed_notes(self, user_ids):
+        total = self.options['notes']
+        rows = partial(
+            note_rows,
+            self.options['seed'],
+            self.options['prefix'],
+            total,
+            len(user_ids),
+            self.options['batch_size'],
+        )
+        done = 0
+        for batch in self.batches(rows, total):
+            Note.objects.bulk_create(
+                Note(
+                    author_id=user_ids[user], title=title, text=text, slug=slug
+                )
+                for user, title, text, slug in batch
+            )
+            done += len(batch)
+            self.stdout.write(f'Заметок: {done}/{total}')
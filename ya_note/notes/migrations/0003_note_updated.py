@@ -0,0 +1,20 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:45
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='note',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменено'),
+            preserve_default=False,
+        ),
+    ]
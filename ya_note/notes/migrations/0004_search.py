@@ -0,0 +1,104 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:28
+
+import re
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Копия схемы и правил разбора из notes.search на момент миграции:
+# дальнейшие правки модуля не должны менять то, что делает миграция.
+FTS_TABLE = 'notes_note_fts'
+TITLE_WEIGHT = 10
+TEXT_WEIGHT = 1
+TERM_LENGTH = 50
+BATCH_SIZE = 1_000
+WORD = re.compile(r'\w+')
+
+
+def folded(column):
+    return f"replace(replace({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def uses_fts(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def note_terms(NoteTerm, note):
+    weights = {}
+    for weight, text in ((TITLE_WEIGHT, note.title), (TEXT_WEIGHT, note.text)):
+        for word in WORD.findall(text.lower().replace('ё', 'е')):
+            weights[word] = weights.get(word, 0) + weight
+    return [
+        NoteTerm(
+            note_id=note.pk,
+            author_id=note.author_id,
+            term=word[:TERM_LENGTH],
+            weight=weight,
+        )
+        for word, weight in weights.items()
+    ]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if uses_fts(connection):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            'USING fts5(author, title, text, '
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        # Регистр токенизатор FTS5 сводит сам, поэтому хватает замены «ё».
+        schema_editor.execute(
+            f'INSERT INTO {FTS_TABLE} (rowid, author, title, text) '
+            f'SELECT id, CAST(author_id AS TEXT), {folded("title")}, '
+            f'{folded("text")} FROM notes_note'
+        )
+        return
+    Note = apps.get_model('notes', 'Note')
+    NoteTerm = apps.get_model('notes', 'NoteTerm')
+    notes = Note.objects.using(connection.alias).only(
+        'id', 'author_id', 'title', 'text'
+    ).iterator(chunk_size=BATCH_SIZE)
+    terms = []
+    for note in notes:
+        terms.extend(note_terms(NoteTerm, note))
+        if len(terms) >= BATCH_SIZE:
+            NoteTerm.objects.using(connection.alias).bulk_create(terms)
+            terms = []
+    NoteTerm.objects.using(connection.alias).bulk_create(terms)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('notes', '0003_note_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NoteTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.PositiveIntegerField()),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('note', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='notes.note')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='noteterm',
+            index=models.Index(fields=['author', 'term', 'note'], name='noteterm_author_term_idx'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
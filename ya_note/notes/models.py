@@ -1,8 +1,84 @@
+import re
+import secrets
+from functools import lru_cache
+from hashlib import sha256
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Max
+from django.db.models.functions import Cast, Substr
 
 from pytils.translit import slugify
 
+# Сколько вариантов slug проверяется одним запросом и сколько раз
+# повторяется вставка, если параллельный запрос занял выбранный slug.
+# Переход к следующему окну попыткой не считается.
+SLUG_CANDIDATES = 10
+SLUG_ATTEMPTS = 5
+DEFAULT_SLUG = 'note'
+
+
+@lru_cache(maxsize=1024)
+def transliterate(title):
+    """Транслитерация заголовка; повторяющиеся заголовки берутся из кеша."""
+    return slugify(title)
+
+
+def slug_variants(base, start, max_length):
+    """Варианты slug с номерами от start: base, base-2, base-3, ..."""
+    for number in range(start, start + SLUG_CANDIDATES):
+        suffix = f'-{number}' if number > 1 else ''
+        yield base[:max_length - len(suffix)] + suffix
+
+
+def search_index(using):
+    """Поисковый индекс базы using; модуль поиска сам зависит от моделей."""
+    from .search import get_index
+    return get_index(using or 'default')
+
+
+class NoteQuerySet(models.QuerySet):
+    """
+    Массовые операции с заметками.
+
+    Note.save() при них не вызывается, поэтому поисковый индекс
+    обновляется здесь же, в той же транзакции.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        with transaction.atomic(using=self.db):
+            objs = super().bulk_create(objs, *args, **kwargs)
+            # SQLite не возвращает id после bulk_create, а slug уникален.
+            search_index(self.db).add(
+                self.model.objects.using(self.db).filter(
+                    slug__in=[note.slug for note in objs]
+                ).only('id', 'author_id', 'title', 'text')
+            )
+        return objs
+
+    def update(self, **kwargs):
+        if not {'title', 'text', 'author', 'author_id'} & kwargs.keys():
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            search_index(self.db).add(
+                self.model.objects.using(self.db).filter(
+                    pk__in=ids
+                ).only('id', 'author_id', 'title', 'text').iterator()
+            )
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            ids = list(self.values_list('pk', flat=True))
+            result = super().delete()
+            search_index(self.db).remove(ids)
+        return result
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -27,12 +103,199 @@ class Note(models.Model):
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
     )
+    updated = models.DateTimeField('Изменено', auto_now=True)
+
+    objects = NoteQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
 
     def __str__(self):
         return self.title
 
+    @classmethod
+    def slug_max_length(cls):
+        return cls._meta.get_field('slug').max_length
+
+    @classmethod
+    def last_slug_number(cls, base):
+        """
+        Наибольший номер среди slug вида base-N или 0.
+
+        Диапазон по уникальному индексу отбирает только slug, которые
+        начинаются с base- («.» следует за «-»), регулярное выражение -
+        только с числом после него.
+        """
+        prefix = f'{base}-'
+        return cls.objects.filter(
+            slug__gt=prefix,
+            slug__lt=f'{base}.',
+            slug__regex=rf'^{re.escape(prefix)}[0-9]+$',
+        ).aggregate(number=Max(Cast(
+            Substr('slug', len(prefix) + 1), models.BigIntegerField()
+        )))['number'] or 0
+
+    def slug_is_taken(self):
+        return Note.objects.filter(slug=self.slug).exclude(
+            pk=self.pk
+        ).exists()
+
+    def base_slug(self):
+        """Slug из заголовка, от которого считаются варианты с номерами."""
+        return (
+            transliterate(self.title)[:self.slug_max_length()]
+            or DEFAULT_SLUG
+        )
+
+    def free_slug(self, start):
+        """Первый свободный вариант из очередного окна или None."""
+        candidates = list(
+            slug_variants(self.base_slug(), start, self.slug_max_length())
+        )
+        taken = set(
+            Note.objects.filter(slug__in=candidates).exclude(
+                pk=self.pk
+            ).values_list('slug', flat=True)
+        )
+        return next(
+            (slug for slug in candidates if slug not in taken), None
+        )
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """Сохраняет заметку и её запись в поисковом индексе вместе."""
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            self.save_with_slug(*args, **kwargs)
+            search_index(self._state.db).add([self])
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or self._state.db
+        pk = self.pk
+        with transaction.atomic(using=using, savepoint=False):
+            result = super().delete(*args, **kwargs)
+            search_index(using).remove([pk])
+        return result
+
+    def save_with_slug(self, *args, **kwargs):
+        """
+        Пустой slug подбирается по заголовку с числовым суффиксом.
+
+        Занятость проверяется одним запросом на окно вариантов; если
+        окно занято целиком, следующее начинается за наибольшим занятым
+        номером. Гонку с параллельной вставкой решает уникальный индекс:
+        если slug успели занять, берётся следующий свободный вариант,
+        остальные ошибки целостности не перехватываются.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        start = 1
+        races = 0
+        while True:
+            self.slug = self.free_slug(start)
+            if self.slug is None:
+                start = max(
+                    start + SLUG_CANDIDATES,
+                    self.last_slug_number(self.base_slug()) + 1
+                )
+                continue
+            try:
+                with transaction.atomic(using=kwargs.get('using')):
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                races += 1
+                if races == SLUG_ATTEMPTS or not self.slug_is_taken():
+                    raise
+
+
+def assign_unique_slugs(notes):
+    """
+    Проставляет уникальные slug пачке новых заметок перед bulk_create.
+
+    Заданный slug остаётся базой, пустой строится из заголовка. Занятые
+    варианты ищутся одним запросом на всю пачку; дополнительные запросы
+    нужны только для совпадений. Повторы внутри пачки тоже разводятся
+    номерами.
+    """
+    max_length = Note.slug_max_length()
+    bases = [note.slug or note.base_slug() for note in notes]
+    checked = set(bases)
+    taken = set(
+        Note.objects.filter(slug__in=checked).values_list('slug', flat=True)
+    )
+    for note, base in zip(notes, bases):
+        start = 1
+        while True:
+            variants = list(slug_variants(base, start, max_length))
+            unchecked = set(variants) - checked
+            if unchecked:
+                checked |= unchecked
+                taken |= set(
+                    Note.objects.filter(slug__in=unchecked).values_list(
+                        'slug', flat=True
+                    )
+                )
+            note.slug = next(
+                (slug for slug in variants if slug not in taken), None
+            )
+            if note.slug:
+                break
+            start = max(
+                start + SLUG_CANDIDATES, Note.last_slug_number(base) + 1
+            )
+        taken.add(note.slug)
+    return notes
+
+
+class NoteTerm(models.Model):
+    """Слово заметки в обратном индексе для баз без FTS5."""
+    note = models.ForeignKey(Note, on_delete=models.CASCADE)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    term = models.CharField(max_length=50)
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = (
+            models.Index(
+                fields=('author', 'term', 'note'),
+                name='noteterm_author_term_idx'
+            ),
+        )
+
+
+def token_digest(key):
+    return sha256(key.encode()).hexdigest()
+
+
+class ApiTokenQuerySet(models.QuerySet):
+
+    def issue(self, user):
+        """Новый ключ API пользователя; в базе хранится только его хеш."""
+        key = secrets.token_urlsafe(32)
+        self.create(user=user, digest=token_digest(key))
+        return key
+
+    def user_for(self, key):
+        """Активный владелец ключа или None."""
+        token = self.filter(digest=token_digest(key)).select_related(
+            'user'
+        ).first()
+        if token is None or not token.user.is_active:
+            return None
+        return token.user
+
+
+class ApiToken(models.Model):
+    """Ключ JSON API для интеграций, заголовок Authorization: Token."""
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='api_tokens',
+    )
+    digest = models.CharField(max_length=64, unique=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    objects = ApiTokenQuerySet.as_manager()
@@ -0,0 +1,225 @@
+"""
+Профилирование SQL и шаблонов по запросам, как news.profiling в ya_news.
+
+Работает для доли запросов SQL_PROFILING_RATE; при 0 middleware
+выключен целиком (MiddlewareNotUsed). Выбранный запрос получает
+заголовок Server-Timing: время в базе, повторы SQL по отпечатку (N+1)
+и самые дорогие шаблоны и блоки. Запрос дольше SQL_PROFILING_SLOW_MS
+попадает строкой JSON в журнал SQL_PROFILING_LOG.
+
+Заметки личные, поэтому в журнал идёт путь без строки запроса (в ?q=
+поиска - слова из заметок) и id пользователя: стоимость списка и
+поиска растёт с числом заметок, и по id видно, чей список дорогой.
+Запросы к базе из пула потоков асинхронных страниц не учитываются.
+"""
+import json
+import logging
+import re
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from functools import wraps
+from logging.handlers import RotatingFileHandler
+from random import random
+from time import perf_counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Template
+from django.template.loader_tags import BLOCK_CONTEXT_KEY, BlockNode
+from django.utils import timezone
+
+LOG_BACKUPS = 5
+# Сколько самых частых повторов и самых долгих шаблонов попадает в
+# журнал и сколько шаблонов - в Server-Timing.
+TOP_DUPLICATES = 5
+TOP_TEMPLATES = 10
+TOP_TIMING_TEMPLATES = 3
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%s")
+LISTS = re.compile(r'\(\?(?:\s*,\s*\?)+\)')
+SPACES = re.compile(r'\s+')
+
+
+current_profile = ContextVar('current_profile', default=None)
+
+
+def fingerprint(sql):
+    """SQL без значений: одинаков у запросов, отличающихся параметрами."""
+    sql = LITERALS.sub('?', sql)
+    return SPACES.sub(' ', LISTS.sub('(...)', sql)).strip()
+
+
+class RequestProfile:
+    """Обёртка execute_wrapper: собирает запросы одного HTTP-запроса."""
+
+    def __init__(self):
+        self.start = perf_counter()
+        self.queries = Counter()
+        self.db_ms = 0.0
+        self.render_ms = 0.0
+        # Имя шаблона или блока: число отрисовок, полное и собственное
+        # время; в стеке - время вложенных отрисовок текущего уровня.
+        self.templates = defaultdict(lambda: [0, 0.0, 0.0])
+        self.stack = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (perf_counter() - start) * 1000
+            self.queries[fingerprint(sql)] += 1
+
+    def timed(self, name, render, *args):
+        start = perf_counter()
+        self.stack.append(0.0)
+        try:
+            return render(*args)
+        finally:
+            elapsed = (perf_counter() - start) * 1000
+            nested = self.stack.pop()
+            if self.stack:
+                self.stack[-1] += elapsed
+            else:
+                self.render_ms += elapsed
+            stats = self.templates[name]
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] += elapsed - nested
+
+    def slowest_templates(self, limit):
+        """Шаблоны и блоки по убыванию собственного времени."""
+        return sorted(
+            self.templates.items(), key=lambda item: -item[1][2]
+        )[:limit]
+
+    @property
+    def duplicates(self):
+        return [
+            (sql, count) for sql, count in self.queries.most_common()
+            if count > 1
+        ]
+
+    def server_timing(self, total_ms):
+        queries = sum(self.queries.values())
+        duplicated = sum(count - 1 for _, count in self.duplicates)
+        return ', '.join((
+            f'db;dur={self.db_ms:.1f};'
+            f'desc="{queries} queries, {duplicated} duplicated"',
+            f'render;dur={self.render_ms:.1f}',
+            *(
+                f'tpl{index};dur={own_ms:.1f};desc="{name}"'
+                for index, (name, (_, _, own_ms)) in enumerate(
+                    self.slowest_templates(TOP_TIMING_TEMPLATES)
+                )
+            ),
+            f'total;dur={total_ms:.1f}',
+        ))
+
+
+def profiled(render, name):
+    """render шаблона или блока, который отмечается в текущем профиле."""
+    @wraps(render)
+    def wrapper(node, context):
+        profile = current_profile.get()
+        if profile is None:
+            return render(node, context)
+        return profile.timed(name(node, context), render, node, context)
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def template_name(template, context):
+    return template.name or '<string>'
+
+
+def block_name(block, context):
+    """Блок подписывается шаблоном, из которого берётся его содержимое."""
+    blocks = context.render_context.get(BLOCK_CONTEXT_KEY)
+    source = (blocks and blocks.get_block(block.name)) or block
+    origin = getattr(source, 'origin', None)
+    return f'{getattr(origin, "template_name", None)}#{block.name}'
+
+
+def install_template_hooks():
+    """
+    Подменяет Template._render, через который рисуются и страница, и
+    include, и родитель из extends, и BlockNode.render. Вне выбранных
+    запросов подмена стоит одного чтения ContextVar.
+    """
+    if not getattr(Template._render, 'profiled', False):
+        Template._render = profiled(Template._render, template_name)
+    if not getattr(BlockNode.render, 'profiled', False):
+        BlockNode.render = profiled(BlockNode.render, block_name)
+
+
+class SqlProfilingMiddleware:
+
+    def __init__(self, get_response):
+        self.rate = settings.SQL_PROFILING_RATE
+        if not self.rate:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log = RotatingFileHandler(
+            settings.SQL_PROFILING_LOG,
+            maxBytes=settings.SQL_PROFILING_LOG_BYTES,
+            backupCount=LOG_BACKUPS,
+            encoding='utf-8',
+            delay=True
+        )
+        install_template_hooks()
+
+    def __call__(self, request):
+        if random() >= self.rate:
+            return self.get_response(request)
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            current_profile.reset(token)
+        total_ms = (perf_counter() - profile.start) * 1000
+        response['Server-Timing'] = profile.server_timing(total_ms)
+        if total_ms >= settings.SQL_PROFILING_SLOW_MS:
+            self.write(request, response, profile, total_ms)
+        return response
+
+    def write(self, request, response, profile, total_ms):
+        # Без AuthenticationMiddleware, например после редиректа
+        # CommonMiddleware, пользователя у запроса нет.
+        user = getattr(request, 'user', None)
+        entry = {
+            'time': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'user': user and user.pk,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 1),
+            'db_ms': round(profile.db_ms, 1),
+            'render_ms': round(profile.render_ms, 1),
+            'queries': sum(profile.queries.values()),
+            'duplicates': [
+                {'sql': sql, 'count': count}
+                for sql, count in profile.duplicates[:TOP_DUPLICATES]
+            ],
+            'templates': [
+                {
+                    'name': name,
+                    'count': count,
+                    'ms': round(total, 1),
+                    'own_ms': round(own, 1),
+                }
+                for name, (count, total, own) in profile.slowest_templates(
+                    TOP_TEMPLATES
+                )
+            ],
+        }
+        self.log.handle(logging.makeLogRecord(
+            {'msg': json.dumps(entry, ensure_ascii=False)}
+        ))
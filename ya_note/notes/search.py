@@ -0,0 +1,213 @@
+"""
+Полнотекстовый поиск по заметкам пользователя.
+
+На SQLite с FTS5 индекс - виртуальная таблица FTS_TABLE, на остальных
+базах - обратный индекс в модели NoteTerm. Оба обновляются при каждом
+сохранении и удалении заметок (см. Note и NoteQuerySet) и
+пересобираются командой rebuild_search_index.
+
+Запрос разбивается на слова; заметка подходит, если в заголовке или
+тексте есть все слова, последнее - как начало слова. Совпадения в
+заголовке весят больше, чем в тексте.
+"""
+import re
+import sqlite3
+from functools import lru_cache, reduce
+from itertools import islice
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q, Sum
+
+from .models import Note, NoteTerm
+
+FTS_TABLE = 'notes_note_fts'
+TITLE_WEIGHT = 10
+TEXT_WEIGHT = 1
+BATCH_SIZE = 1_000
+MAX_QUERY_WORDS = 10
+WORD = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Нижний регистр и «е» вместо «ё», которую FTS5 не сводит к «е»."""
+    return text.lower().replace('ё', 'е')
+
+
+def words(text):
+    return WORD.findall(normalize(text))
+
+
+def batches(items, size=BATCH_SIZE):
+    items = iter(items)
+    while batch := list(islice(items, size)):
+        yield batch
+
+
+@lru_cache(maxsize=None)
+def sqlite_has_fts5():
+    """Собрана ли библиотека SQLite модуля sqlite3 с FTS5."""
+    connection = sqlite3.connect(':memory:')
+    try:
+        return bool(connection.execute(
+            "SELECT sqlite_compileoption_used('ENABLE_FTS5')"
+        ).fetchone()[0])
+    finally:
+        connection.close()
+
+
+def uses_fts(connection):
+    return connection.vendor == 'sqlite' and sqlite_has_fts5()
+
+
+class FtsIndex:
+    """Индекс в виртуальной таблице FTS5; rowid совпадает с id заметки."""
+
+    def __init__(self, using):
+        self.connection = connections[using]
+
+    @staticmethod
+    def create(schema_editor):
+        schema_editor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+            'USING fts5(author, title, text, '
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+
+    @staticmethod
+    def drop(schema_editor):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+    def add(self, notes):
+        with self.connection.cursor() as cursor:
+            for batch in batches(notes):
+                cursor.executemany(
+                    f'INSERT OR REPLACE INTO {FTS_TABLE} '
+                    '(rowid, author, title, text) VALUES (%s, %s, %s, %s)',
+                    [
+                        (
+                            note.pk,
+                            str(note.author_id),
+                            normalize(note.title),
+                            normalize(note.text),
+                        )
+                        for note in batch
+                    ]
+                )
+
+    def remove(self, ids):
+        with self.connection.cursor() as cursor:
+            for batch in batches(ids):
+                cursor.execute(
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid IN '
+                    f'({", ".join(["%s"] * len(batch))})',
+                    batch
+                )
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+
+    def search(self, author_id, query_words, offset, limit):
+        # Слова берутся в кавычки, поэтому операторы FTS5 в запросе
+        # пользователя не работают и не ломают разбор.
+        terms = ' '.join(f'"{word}"' for word in query_words) + '*'
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 0, %s, %s), rowid DESC '
+                'LIMIT %s OFFSET %s',
+                (
+                    f'author:"{author_id}" AND {{title text}}:({terms})',
+                    TITLE_WEIGHT,
+                    TEXT_WEIGHT,
+                    limit,
+                    offset,
+                )
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+class TermIndex:
+    """Обратный индекс в таблице NoteTerm: слово, заметка и вес."""
+
+    def __init__(self, using):
+        self.terms = NoteTerm.objects.using(using)
+
+    @staticmethod
+    def note_terms(note):
+        weights = {}
+        for weight, text in (
+            (TITLE_WEIGHT, note.title), (TEXT_WEIGHT, note.text)
+        ):
+            for word in words(text):
+                weights[word] = weights.get(word, 0) + weight
+        max_length = NoteTerm._meta.get_field('term').max_length
+        return [
+            NoteTerm(
+                note_id=note.pk,
+                author_id=note.author_id,
+                term=word[:max_length],
+                weight=weight,
+            )
+            for word, weight in weights.items()
+        ]
+
+    def add(self, notes):
+        for batch in batches(notes):
+            self.remove([note.pk for note in batch])
+            self.terms.bulk_create(
+                term for note in batch for term in self.note_terms(note)
+            )
+
+    def remove(self, ids):
+        for batch in batches(ids):
+            self.terms.filter(note_id__in=batch).delete()
+
+    def clear(self):
+        self.terms.all().delete()
+
+    def search(self, author_id, query_words, offset, limit):
+        *whole, prefix = query_words
+        conditions = [Q(term=word) for word in whole]
+        conditions.append(Q(term__startswith=prefix))
+        terms = self.terms.filter(author_id=author_id)
+        matches = terms.filter(reduce(or_, conditions))
+        for condition in conditions:
+            matches = matches.filter(
+                note_id__in=terms.filter(condition).values('note_id')
+            )
+        return list(
+            matches.values('note_id').annotate(
+                score=Sum('weight')
+            ).order_by('-score', '-note_id').values_list(
+                'note_id', flat=True
+            )[offset:offset + limit]
+        )
+
+
+def get_index(using):
+    connection = connections[using]
+    return FtsIndex(using) if uses_fts(connection) else TermIndex(using)
+
+
+def search_notes(author, query, page=1, page_size=20, using='default'):
+    """
+    Страница найденных заметок по убыванию релевантности.
+
+    Возвращает заметки и признак того, что есть следующая страница.
+    """
+    query_words = words(query)[:MAX_QUERY_WORDS]
+    if not query_words:
+        return [], False
+    ids = get_index(using).search(
+        author.pk, query_words, (page - 1) * page_size, page_size + 1
+    )
+    has_next = len(ids) > page_size
+    ids = ids[:page_size]
+    # Заметки читаются заново: так в выдачу не попадут записи индекса,
+    # оставшиеся от заметок, удалённых мимо Note.delete().
+    notes = Note.objects.using(using).filter(
+        author=author, pk__in=ids
+    ).only('id', 'slug', 'title').in_bulk()
+    return [notes[pk] for pk in ids if pk in notes], has_next
@@ -0,0 +1,63 @@
+"""
+Бюджеты SQL-запросов и времени ответа для страниц YaNote.
+
+Все бюджеты собраны в таблице BUDGETS, размеры данных - в SCALES.
+Самые большие размеры долго наполняются, поэтому по умолчанию
+проверяются размеры не больше BUDGET_MAX_SCALE из переменной окружения.
+Время на общей машине скачет, поэтому его бюджеты проверяются, только
+если задан множитель BUDGET_TIME_FACTOR; число запросов - всегда.
+"""
+import os
+from collections import namedtuple
+from time import perf_counter
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+Budget = namedtuple('Budget', ('queries', 'sql_ms', 'response_ms'))
+
+SCALES = tuple(
+    scale for scale in (10, 1_000, 100_000)
+    if scale <= int(os.getenv('BUDGET_MAX_SCALE', 1_000))
+)
+TIME_FACTOR = float(os.getenv('BUDGET_TIME_FACTOR', 0))
+
+# Сессия хранится в cookie, а пользователь в кеше (notes.auth), так что
+# число запросов включает только чтение пользователя при промахе кеша,
+# для NoteDetail ещё и проверку условного GET, а для NoteCreate - точку
+# сохранения транзакции вокруг вставки и запись в поисковый индекс.
+BUDGETS = {
+    'NotesList': Budget(queries=2, sql_ms=50, response_ms=300),
+    'NoteDetail': Budget(queries=3, sql_ms=50, response_ms=300),
+    'NoteCreate': Budget(queries=5, sql_ms=50, response_ms=300),
+}
+
+
+class BudgetMixin:
+    """Проверка бюджетов для TestCase."""
+
+    def assertWithinBudget(self, name, request):
+        budget = BUDGETS[name]
+        start = perf_counter()
+        with CaptureQueriesContext(connection) as captured:
+            response = request()
+        response_ms = (perf_counter() - start) * 1000
+        self.assertLessEqual(
+            len(captured), budget.queries,
+            f'{name}: SQL-запросов\n' + '\n'.join(
+                query['sql'] for query in captured.captured_queries
+            )
+        )
+        if TIME_FACTOR:
+            sql_ms = sum(
+                float(query['time']) for query in captured.captured_queries
+            ) * 1000
+            self.assertLessEqual(
+                sql_ms, budget.sql_ms * TIME_FACTOR, f'{name}: SQL, мс'
+            )
+            self.assertLessEqual(
+                response_ms,
+                budget.response_ms * TIME_FACTOR,
+                f'{name}: ответ, мс'
+            )
+        return response
@@ -0,0 +1,224 @@
+import json
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from pytils.translit import slugify
+
+from ..models import ApiToken, Note
+
+
+User = get_user_model()
+
+API_LIST_URL = reverse('notes:api-list')
+API_BATCH_URL = reverse('notes:api-batch')
+
+
+def detail_url(slug):
+    return reverse('notes:api-detail', args=(slug,))
+
+
+class TestNotesApi(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='slug', author=cls.author
+        )
+        cls.other = Note.objects.create(
+            title='Чужая', text='Текст', slug='other', author=cls.reader
+        )
+
+    def send(self, method, url, data):
+        return getattr(self.author_client, method)(
+            url, json.dumps(data), content_type='application/json'
+        )
+
+    def test_anonymous_gets_unauthorized(self):
+        for url in (API_LIST_URL, detail_url('slug')):
+            with self.subTest(url=url):
+                response = Client().get(url)
+                self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_list_and_retrieve_only_own_notes(self):
+        response = self.author_client.get(API_LIST_URL)
+        self.assertEqual(
+            [note['slug'] for note in response.json()['results']], ['slug']
+        )
+        self.assertEqual(
+            self.author_client.get(detail_url('other')).status_code,
+            HTTPStatus.NOT_FOUND
+        )
+
+    @override_settings(NOTES_PAGE_SIZE=2)
+    def test_list_pages(self):
+        second = Note.objects.create(
+            title='Вторая', text='Текст', author=self.author
+        )
+        response = self.author_client.get(API_LIST_URL)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertIsNone(response.json()['next'])
+
+        Note.objects.create(title='Третья', text='Текст', author=self.author)
+        response = self.author_client.get(API_LIST_URL)
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(response.json()['next'], second.pk)
+
+    def test_create_validates_with_note_form(self):
+        response = self.send('post', API_LIST_URL, {'title': 'Без текста'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        self.assertIn('text', response.json()['errors'])
+
+        response = self.send(
+            'post', API_LIST_URL, {'title': 'Новая', 'text': 'Текст'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(response.json()['slug'], slugify('Новая'))
+
+        response = self.send(
+            'post', API_LIST_URL,
+            {'title': 'Новая', 'text': 'Текст', 'slug': 'other'}
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CONFLICT)
+
+    def test_update_and_delete(self):
+        response = self.send('patch', detail_url('slug'), {'text': 'Новый'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.note.refresh_from_db()
+        self.assertEqual(
+            (self.note.title, self.note.text), ('Заголовок', 'Новый')
+        )
+        response = self.send('put', detail_url('slug'), {'title': 'Только'})
+        self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+        response = self.author_client.delete(detail_url('slug'))
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assertFalse(Note.objects.filter(pk=self.note.pk).exists())
+
+    def test_batch_applies_all_changes(self):
+        response = self.send('post', API_BATCH_URL, {
+            'delete': [self.note.pk, self.other.pk],
+            'update': [],
+            'create': [
+                {'title': 'Заголовок', 'text': 'Первая'},
+                {'title': 'Вторая', 'text': 'Текст', 'slug': 'slug'},
+            ],
+        })
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        data = response.json()
+        self.assertEqual(data['deleted'], 1)
+        self.assertEqual(
+            [note['slug'] for note in data['created']],
+            [slugify('Заголовок'), 'slug']
+        )
+        self.assertTrue(Note.objects.filter(pk=self.other.pk).exists())
+
+        created = data['created'][0]
+        response = self.send('post', API_BATCH_URL, {
+            'update': [{'id': created['id'], 'text': 'Изменена'}],
+        })
+        self.assertEqual(
+            response.json()['updated'][0]['text'], 'Изменена'
+        )
+
+    def test_batch_is_all_or_nothing(self):
+        before = list(Note.objects.values_list('pk', 'title', 'text'))
+        for payload, status in (
+            (
+                {
+                    'delete': [self.note.pk],
+                    'create': [{'title': 'Без текста'}],
+                },
+                HTTPStatus.BAD_REQUEST,
+            ),
+            (
+                {
+                    'update': [{'id': self.other.pk, 'text': 'Чужой'}],
+                    'create': [{'title': 'Новая', 'text': 'Текст'}],
+                },
+                HTTPStatus.BAD_REQUEST,
+            ),
+            (
+                {
+                    'delete': [self.note.pk],
+                    'create': [
+                        {'title': 'А', 'text': 'Текст', 'slug': 'other'}
+                    ],
+                },
+                HTTPStatus.CONFLICT,
+            ),
+        ):
+            with self.subTest(payload=payload):
+                response = self.send('post', API_BATCH_URL, payload)
+                self.assertEqual(response.status_code, status)
+                self.assertEqual(
+                    list(Note.objects.values_list('pk', 'title', 'text')),
+                    before
+                )
+
+
+class TestApiAuth(TestCase):
+    """Ключ API без CSRF и сессия браузера с CSRF-токеном."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.key = ApiToken.objects.issue(cls.author)
+
+    def post(self, client, **headers):
+        return client.post(
+            API_LIST_URL,
+            json.dumps({'title': 'Заметка', 'text': 'Текст'}),
+            content_type='application/json',
+            **headers
+        )
+
+    def test_token_client_needs_no_csrf(self):
+        client = Client(
+            enforce_csrf_checks=True, HTTP_AUTHORIZATION=f'Token {self.key}'
+        )
+        response = self.post(client)
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+        self.assertEqual(
+            Note.objects.get(slug=response.json()['slug']).author, self.author
+        )
+        self.assertEqual(client.get(API_LIST_URL).status_code, HTTPStatus.OK)
+
+    def test_bad_or_inactive_token_is_rejected(self):
+        for header in ('Token wrong', f'Bearer {self.key}'):
+            with self.subTest(header=header):
+                response = Client().get(
+                    API_LIST_URL, HTTP_AUTHORIZATION=header
+                )
+                self.assertEqual(
+                    response.status_code, HTTPStatus.UNAUTHORIZED
+                )
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        response = Client().get(
+            API_LIST_URL, HTTP_AUTHORIZATION=f'Token {self.key}'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_session_client_needs_csrf_token(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.author)
+        self.assertEqual(self.post(client).status_code, HTTPStatus.FORBIDDEN)
+        # Cookie csrftoken ставит любая страница с формой.
+        client.get(reverse('notes:add'))
+        response = self.post(
+            client, HTTP_X_CSRFTOKEN=client.cookies['csrftoken'].value
+        )
+        self.assertEqual(response.status_code, HTTPStatus.CREATED)
+
+    def test_issue_api_token_command(self):
+        out = StringIO()
+        call_command('issue_api_token', 'author', stdout=out)
+        key = out.getvalue().strip()
+        self.assertEqual(ApiToken.objects.user_for(key), self.author)
+        self.assertFalse(ApiToken.objects.filter(digest=key).exists())
@@ -0,0 +1,99 @@
+import asyncio
+import json
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.asgi import ASGIHandler
+from django.test import Client, RequestFactory, TransactionTestCase
+from django.urls import reverse
+
+from ..async_views import note_detail, notes_list
+from ..jsonl import spool
+from ..models import Note
+
+
+User = get_user_model()
+
+
+class TestAsyncViews(TransactionTestCase):
+    """
+    Асинхронные варианты ходят в базу из пула потоков, поэтому данные
+    теста должны быть закоммичены.
+    """
+
+    def setUp(self):
+        self.author = User.objects.create(username='author')
+        self.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug='slug', author=self.author
+        )
+
+    def request(self, view, **kwargs):
+        request = RequestFactory().get('/')
+        request.user = self.author
+        return view(request, **kwargs)
+
+    def test_async_views_render_notes(self):
+        for view, kwargs, content in (
+            (notes_list, {}, self.note.title),
+            (note_detail, {'slug': self.note.slug}, self.note.text),
+        ):
+            with self.subTest(view=view.view_class.__name__):
+                self.assertTrue(asyncio.iscoroutinefunction(view))
+                response = asyncio.run(self.request(view, **kwargs))
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertContains(response, content)
+
+    def test_async_views_run_concurrently(self):
+        async def load():
+            return await asyncio.gather(*(
+                self.request(note_detail, slug=self.note.slug)
+                for _ in range(5)
+            ))
+
+        self.assertEqual(
+            {response.status_code for response in asyncio.run(load())},
+            {HTTPStatus.OK}
+        )
+
+    def test_export_through_asgi_handler(self):
+        client = Client()
+        client.force_login(self.author)
+        cookie = '; '.join(
+            f'{name}={morsel.value}' for name, morsel in client.cookies.items()
+        )
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': reverse('notes:export'),
+            'query_string': b'',
+            'headers': [
+                (b'host', b'testserver'), (b'cookie', cookie.encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(ASGIHandler()(scope, receive, send))
+        self.assertEqual(messages[0]['status'], HTTPStatus.OK)
+        self.assertIn(
+            (b'Content-Disposition', b'attachment; filename="notes.jsonl"'),
+            messages[0]['headers']
+        )
+        body = b''.join(
+            message.get('body', b'') for message in messages[1:]
+        )
+        self.assertEqual(
+            json.loads(body)['slug'], self.note.slug
+        )
+
+    def test_spool_rolls_over_to_disk(self):
+        lines = [f'{number}\n' for number in range(1_000)]
+        file = spool(lines, max_size=100)
+        self.assertTrue(file._rolled)
+        self.assertEqual(file.read().decode(), ''.join(lines))
+        file.close()
@@ -0,0 +1,97 @@
+from http import HTTPStatus
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..auth import user_cache, user_key
+
+User = get_user_model()
+
+HOME_URL = reverse('notes:home')
+SUCCESS_URL = reverse('notes:success')
+LOGOUT_URL = reverse('users:logout')
+
+
+class TestCachedAuth(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    def setUp(self):
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        # Первый запрос кладёт пользователя в кеш.
+        self.author_client.get(HOME_URL)
+
+    def test_cheap_pages_without_queries(self):
+        for url in (HOME_URL, SUCCESS_URL):
+            with self.subTest(url=url), self.assertNumQueries(0):
+                response = self.author_client.get(url)
+            self.assertContains(response, 'пользователя author')
+
+    def test_logout_forgets_user(self):
+        self.assertIsNotNone(user_cache().get(user_key(self.author.pk)))
+        self.author_client.get(LOGOUT_URL)
+        self.assertIsNone(user_cache().get(user_key(self.author.pk)))
+
+    def test_password_change_ends_old_sessions(self):
+        self.author.set_password('new-password')
+        self.author.save()
+        response = self.author_client.get(SUCCESS_URL)
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        self.assertTrue(response.url.startswith(reverse('users:login')))
+
+    def test_inactive_user_is_logged_out(self):
+        User.objects.filter(pk=self.author.pk).update(is_active=False)
+        # update() не шлёт сигналов, поэтому до истечения TIMEOUT
+        # пользователь берётся из кеша.
+        self.assertEqual(
+            self.author_client.get(SUCCESS_URL).status_code, HTTPStatus.OK
+        )
+        self.author.refresh_from_db()
+        self.author.save()
+        self.assertEqual(
+            self.author_client.get(SUCCESS_URL).status_code,
+            HTTPStatus.FOUND
+        )
+
+
+class TestSharedUserCache(TestCase):
+    """Файловый кеш пользователей, как в prod, общий для процессов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            },
+            'users': {
+                'BACKEND': (
+                    'django.core.cache.backends.filebased.FileBasedCache'
+                ),
+                'LOCATION': directory.name,
+            },
+        })
+        settings.enable()
+        self.addCleanup(settings.disable)
+        # Тот же каталог глазами другого процесса сервера.
+        self.other_process = FileBasedCache(directory.name, {})
+
+    def test_password_change_reaches_other_processes(self):
+        author_client = Client()
+        author_client.force_login(self.author)
+        author_client.get(HOME_URL)
+        key = user_key(self.author.pk)
+        self.assertIsNotNone(self.other_process.get(key))
+        self.author.set_password('new-password')
+        self.author.save()
+        self.assertIsNone(self.other_process.get(key))
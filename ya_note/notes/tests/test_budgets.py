@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from .budgets import SCALES, BudgetMixin
+from ..models import Note
+
+
+User = get_user_model()
+
+NOTES_LIST_URL = reverse('notes:list')
+NOTES_ADD_URL = reverse('notes:add')
+
+
+class TestBudgets(BudgetMixin, TestCase):
+    """Данные растут от меньшего размера к большему внутри одного теста."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+
+    def grow_notes(self, scale):
+        existing = Note.objects.count()
+        Note.objects.bulk_create(
+            Note(
+                title=f'Заметка {index}',
+                text='Текст заметки',
+                slug=f'note-{index}',
+                author=self.author,
+            )
+            for index in range(existing, scale)
+        )
+
+    def test_read_pages_budget(self):
+        for scale in SCALES:
+            self.grow_notes(scale)
+            detail_url = reverse('notes:detail', args=('note-0',))
+            for name, url in (
+                ('NotesList', NOTES_LIST_URL),
+                ('NoteDetail', detail_url),
+            ):
+                with self.subTest(scale=scale, name=name):
+                    response = self.assertWithinBudget(
+                        name, lambda: self.author_client.get(url)
+                    )
+                    self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_note_create_budget(self):
+        for scale in SCALES:
+            self.grow_notes(scale)
+            with self.subTest(scale=scale):
+                response = self.assertWithinBudget(
+                    'NoteCreate',
+                    lambda: self.author_client.post(NOTES_ADD_URL, data={
+                        'title': 'Новая заметка',
+                        'text': 'Текст',
+                        'slug': f'new-{scale}',
+                    })
+                )
+                self.assertEqual(response.status_code, HTTPStatus.FOUND)
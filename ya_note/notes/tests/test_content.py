@@ -1,6 +1,10 @@
+from datetime import timedelta
+from http import HTTPStatus
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from ..forms import NoteForm
 from ..models import Note
@@ -64,6 +68,42 @@ class TestContent(TestCase):
         self.assertEqual(note.slug, self.note.slug)
         self.assertEqual(note.author, self.note.author)
 
+    @override_settings(NOTES_PAGE_SIZE=2)
+    def test_notes_list_keyset_pages(self):
+        for index in range(4):
+            Note.objects.create(
+                title=f'Заметка {index}', text='Текст', author=self.author
+            )
+        pages, after = [], None
+        while True:
+            response = self.author_client.get(
+                NOTES_LIST_URL, {'after': after} if after else {}
+            )
+            notes = list(response.context['object_list'])
+            self.assertLessEqual(len(notes), 2)
+            self.assertTrue(all(
+                note.get_deferred_fields() == {'text', 'author_id', 'updated'}
+                for note in notes
+            ))
+            pages.append([note.pk for note in notes])
+            after = response.context['next_after']
+            if after is None:
+                break
+        self.assertEqual(
+            sum(pages, []),
+            list(Note.objects.filter(author=self.author).order_by(
+                'pk'
+            ).values_list('pk', flat=True))
+        )
+
+    @override_settings(NOTES_PAGE_SIZE=2)
+    def test_full_last_page_has_no_next(self):
+        Note.objects.create(title='Вторая', text='Текст', author=self.author)
+        response = self.author_client.get(NOTES_LIST_URL)
+        self.assertEqual(len(response.context['object_list']), 2)
+        self.assertIsNone(response.context['next_after'])
+        self.assertNotContains(response, 'Дальше')
+
     def test_pages_contains_form(self):
         urls = (
             NOTES_ADD_URL,
@@ -75,3 +115,38 @@ class TestContent(TestCase):
                 response = self.author_client.get(url)
                 response_form = response.context.get('form')
                 self.assertIsInstance(response_form, NoteForm)
+
+    def test_note_detail_conditional_get(self):
+        response = self.author_client.get(NOTES_DETAIL_URL)
+        etag = response['ETag']
+        response = self.author_client.get(
+            NOTES_DETAIL_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+        self.author_client.post(NOTES_EDIT_URL, data={
+            'title': 'Новый заголовок',
+            'text': 'Новый текст',
+            'slug': CONST_SLUG,
+        })
+        response = self.author_client.get(
+            NOTES_DETAIL_URL, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'Новый текст')
+
+    def test_note_detail_last_modified(self):
+        Note.objects.filter(slug=CONST_SLUG).update(updated=timezone.now())
+        self.assertNotIn(
+            'Last-Modified', self.author_client.get(NOTES_DETAIL_URL)
+        )
+        Note.objects.filter(slug=CONST_SLUG).update(
+            updated=timezone.now() - timedelta(minutes=1)
+        )
+        last_modified = self.author_client.get(
+            NOTES_DETAIL_URL
+        )['Last-Modified']
+        response = self.author_client.get(
+            NOTES_DETAIL_URL, HTTP_IF_MODIFIED_SINCE=last_modified
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
@@ -0,0 +1,50 @@
+import re
+from unittest import skipIf
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import RequestFactory, TestCase
+
+from ..models import Note
+from ..views import NoteDetail, NotesList
+
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'\bSCAN (?!.*\bUSING\b)')
+TEMP_SORT = re.compile(r'USE TEMP B-TREE')
+
+
+@skipIf(
+    connection.vendor != 'sqlite',
+    'План запроса проверяется через EXPLAIN QUERY PLAN SQLite.'
+)
+class TestIndexes(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.note = Note.objects.create(
+            title='Заголовок',
+            text='Текст',
+            slug='slug',
+            author=cls.author,
+        )
+
+    def get_view(self, view_class, **kwargs):
+        request = RequestFactory().get('/')
+        request.user = self.author
+        return view_class(request=request, kwargs=kwargs)
+
+    def assertUsesIndex(self, queryset):
+        plan = queryset.explain()
+        self.assertNotRegex(plan, FULL_SCAN, plan)
+        self.assertNotRegex(plan, TEMP_SORT, plan)
+
+    def test_notes_list_uses_index(self):
+        view = self.get_view(NotesList)
+        self.assertUsesIndex(view.get_queryset().order_by('id'))
+
+    def test_note_detail_uses_index(self):
+        view = self.get_view(NoteDetail, slug=self.note.slug)
+        self.assertUsesIndex(view.get_queryset().filter(slug=self.note.slug))
@@ -1,12 +1,19 @@
+import json
 from http import HTTPStatus
+from io import StringIO
 
 from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError
 from django.test import Client, TestCase
 from django.urls import reverse
 from pytils.translit import slugify
+from unittest.mock import patch
 
 from ..forms import WARNING
+from ..jsonl import load_notes
 from ..models import Note
+from ..search import TermIndex, get_index, search_notes, words
 
 
 User = get_user_model()
@@ -87,6 +94,43 @@ class TestNoteCreation(TestCase):
         )
         self.assertEqual(set(Note.objects.all()), notes)
 
+    def test_empty_slug_gets_numeric_suffix(self):
+        self.form_data.pop('slug')
+        for _ in range(3):
+            self.author_client.post(NOTES_ADD_URL, data=self.form_data)
+        base = slugify(self.form_data['title'])
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=self.form_data['title']
+            ).values_list('slug', flat=True)),
+            {base, f'{base}-2', f'{base}-3'}
+        )
+
+    def test_many_notes_with_same_title(self):
+        form_data = {'title': 'Повтор', 'text': 'Текст'}
+        base = slugify(form_data['title'])
+        for _ in range(60):
+            Note.objects.create(author=self.author, **form_data)
+        response = self.author_client.post(NOTES_ADD_URL, data=form_data)
+        self.assertRedirects(response, NOTES_SUCCESS_URL)
+        self.assertTrue(Note.objects.filter(slug=f'{base}-61').exists())
+
+    def test_other_integrity_errors_are_not_slug_errors(self):
+        form_data = {'title': 'Заголовок', 'text': 'Текст', 'slug': 'free'}
+        with patch.object(
+            Note, 'save', side_effect=IntegrityError('NOT NULL')
+        ), self.assertRaises(IntegrityError):
+            self.author_client.post(NOTES_ADD_URL, data=form_data)
+
+    def test_slug_race_is_retried(self):
+        note = Note(title='Гонка', text='Текст', author=self.author)
+        # Первый вариант успел занять параллельный запрос.
+        with patch.object(
+            Note, 'free_slug', side_effect=[self.note.slug, 'free-slug']
+        ):
+            note.save()
+        self.assertEqual(note.slug, 'free-slug')
+
     def test_empty_slug(self):
         notes = set(Note.objects.all())
         self.form_data.pop('slug')
@@ -159,3 +203,159 @@ class TestNoteEditDelete(TestCase):
         self.assertEqual(self.note.slug, note_from_db.slug)
         self.assertEqual(self.note.title, note_from_db.title)
         self.assertEqual(self.note.text, note_from_db.text)
+
+
+class TestSeed(TestCase):
+
+    def seed(self, prefix):
+        call_command(
+            'seed', users=3, notes=40, batch_size=7,
+            prefix=prefix, stdout=StringIO()
+        )
+        return list(
+            Note.objects.filter(slug__startswith=prefix).order_by(
+                'pk'
+            ).values_list('title', 'text')
+        )
+
+    def test_seed_is_deterministic(self):
+        first = self.seed('first')
+        self.assertEqual(len(first), 40)
+        self.assertEqual(User.objects.count(), 3)
+        self.assertEqual(self.seed('second'), first)
+
+    def test_seed_refuses_used_prefix(self):
+        self.seed('first')
+        with self.assertRaisesMessage(CommandError, '--prefix'):
+            self.seed('first')
+        self.assertEqual(User.objects.count(), 3)
+
+
+class TestNotesJsonLines(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.note = Note.objects.create(
+            title='Заголовок', text='Текст', slug=CONST_SLUG, author=cls.author
+        )
+        Note.objects.create(
+            title='Чужая', text='Текст', slug='other', author=cls.reader
+        )
+
+    def test_export_streams_only_own_notes(self):
+        response = self.author_client.get(reverse('notes:export'))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(
+            [json.loads(line) for line in lines],
+            [{'title': 'Заголовок', 'text': 'Текст', 'slug': CONST_SLUG}]
+        )
+
+    def test_import_deduplicates_slugs(self):
+        lines = StringIO(
+            '{"title": "Заголовок", "text": "Текст", "slug": "slug"}\n'
+            '{"title": "Заголовок", "text": "Текст", "slug": "slug"}\n'
+            '{"title": "Без slug", "text": "Текст"}\n'
+            'не json\n'
+            '{"title": "Без текста"}\n'
+        )
+        stdout, stderr = StringIO(), StringIO()
+        with patch('sys.stdin', lines):
+            call_command(
+                'notes_import', 'reader', batch_size=2,
+                stdout=stdout, stderr=stderr
+            )
+        self.assertIn('Загружено заметок: 3', stdout.getvalue())
+        self.assertEqual(len(stderr.getvalue().splitlines()), 2)
+        self.assertEqual(
+            set(Note.objects.filter(author=self.reader).values_list(
+                'slug', flat=True
+            )),
+            {'other', 'slug-2', 'slug-3', slugify('Без slug')}
+        )
+
+    def test_export_import_round_trip(self):
+        stdout = StringIO()
+        call_command('notes_export', 'author', stdout=stdout)
+        with patch('sys.stdin', StringIO(stdout.getvalue())):
+            call_command('notes_import', 'reader', stdout=StringIO())
+        imported = Note.objects.get(author=self.reader, title='Заголовок')
+        self.assertEqual(imported.text, self.note.text)
+        self.assertEqual(imported.slug, f'{CONST_SLUG}-2')
+
+
+class TestNoteSearch(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        cls.in_text = Note.objects.create(
+            title='Покупки', text='Купить ёлку и молоко', slug='text',
+            author=cls.author
+        )
+        cls.in_title = Note.objects.create(
+            title='Ёлка', text='Нарядить к празднику', slug='title',
+            author=cls.author
+        )
+        Note.objects.create(
+            title='Ёлка', text='Чужая ёлка', slug='other', author=cls.reader
+        )
+
+    def search(self, query, user=None):
+        notes, _ = search_notes(user or self.author, query)
+        return [note.slug for note in notes]
+
+    def test_title_ranks_above_text(self):
+        self.assertEqual(self.search('елк'), ['title', 'text'])
+        self.assertEqual(self.search('ёлку молоко'), ['text'])
+
+    def test_index_follows_save_and_delete(self):
+        self.in_text.text = 'Купить хлеб'
+        self.in_text.save()
+        self.assertEqual(self.search('молоко'), [])
+        self.assertEqual(self.search('хлеб'), ['text'])
+        self.in_title.delete()
+        self.assertEqual(self.search('елка'), [])
+        Note.objects.filter(author=self.author).update(text='Ёлочный шар')
+        self.assertEqual(self.search('шар'), ['text'])
+
+    def test_imported_notes_are_indexed(self):
+        load_notes(
+            ['{"title": "Импорт", "text": "Лыжи"}'], self.author
+        )
+        self.assertEqual(self.search('лыжи'), [slugify('Импорт')])
+
+    def test_search_page(self):
+        response = self.author_client.get(
+            reverse('notes:search'), {'q': 'Ёлк'}
+        )
+        self.assertEqual(
+            [note.slug for note in response.context['object_list']],
+            ['title', 'text']
+        )
+        self.assertFalse(response.context['has_next'])
+
+    def test_term_index_matches_fts(self):
+        index = TermIndex('default')
+        index.add(Note.objects.all())
+        self.assertEqual(
+            index.search(self.author.pk, words('елк'), 0, 10),
+            [self.in_title.pk, self.in_text.pk]
+        )
+        self.assertEqual(
+            index.search(self.author.pk, words('ёлку молоко'), 0, 10),
+            [self.in_text.pk]
+        )
+
+    def test_rebuild_command(self):
+        get_index('default').clear()
+        self.assertEqual(self.search('елк'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('елк'), ['title', 'text'])
@@ -0,0 +1,71 @@
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Note
+from ..profiling import RequestProfile, fingerprint
+
+
+User = get_user_model()
+
+NOTES_LIST_URL = reverse('notes:list')
+
+
+class TestProfiling(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(username='author')
+        cls.author_client = Client()
+        cls.author_client.force_login(cls.author)
+        Note.objects.bulk_create(
+            Note(title=f'Заметка {index}', text='Текст', slug=f'note-{index}',
+                 author=cls.author)
+            for index in range(3)
+        )
+
+    def test_fingerprint_drops_values(self):
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id = 5 AND slug = 'a'"),
+            'SELECT * FROM t WHERE id = ? AND slug = ?'
+        )
+
+    def test_profile_finds_repeated_queries(self):
+        profile = RequestProfile()
+        with connection.execute_wrapper(profile):
+            for note in Note.objects.all():
+                Note.objects.filter(pk=note.pk).exists()
+        self.assertEqual(
+            [count for _, count in profile.duplicates], [3]
+        )
+
+    def test_slow_request_is_logged(self):
+        with TemporaryDirectory() as directory:
+            log = Path(directory) / 'slow.jsonl'
+            with override_settings(
+                SQL_PROFILING_RATE=1,
+                SQL_PROFILING_SLOW_MS=0,
+                SQL_PROFILING_LOG=log
+            ):
+                response = self.author_client.get(
+                    NOTES_LIST_URL, {'q': 'тайна'}
+                )
+            self.assertIn('render;dur=', response['Server-Timing'])
+            entry = json.loads(log.read_text(encoding='utf-8'))
+        # Слова из запроса в журнал не попадают.
+        self.assertEqual(entry['path'], NOTES_LIST_URL)
+        self.assertEqual(entry['user'], self.author.pk)
+        self.assertGreater(entry['queries'], 0)
+        self.assertLessEqual(
+            {'notes/list.html', 'base.html', 'includes/header.html'},
+            {template['name'] for template in entry['templates']}
+        )
+
+    def test_profiling_is_off_by_default(self):
+        response = self.author_client.get(NOTES_LIST_URL)
+        self.assertNotIn('Server-Timing', response)
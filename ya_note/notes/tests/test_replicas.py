@@ -0,0 +1,96 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from ..models import Note
+from ..routers import PIN_COOKIE, ReplicaRouter, read_from_replica
+
+User = get_user_model()
+
+REPLICA = 'replica'
+NOTES_LIST_URL = reverse('notes:list')
+
+
+class TestReplicas(TransactionTestCase):
+    """
+    Реплика - отдельный файл SQLite, который догоняет sync_replica().
+
+    Тест транзакционный: копируются только зафиксированные данные.
+    """
+
+    def setUp(self):
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        connections.settings[REPLICA] = {
+            **connections.settings['default'],
+            'NAME': str(Path(directory.name) / 'replica.sqlite3'),
+        }
+        self.addCleanup(self.remove_replica)
+        settings = override_settings(DATABASE_REPLICAS=[REPLICA])
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.author = User.objects.create(username='author')
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        Note.objects.create(
+            title='Старая заметка', text='Текст', author=self.author
+        )
+
+    @staticmethod
+    def sync_replica():
+        source, target = connections['default'], connections[REPLICA]
+        source.ensure_connection()
+        target.ensure_connection()
+        source.connection.backup(target.connection)
+
+    @staticmethod
+    def remove_replica():
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+
+    def test_list_reads_from_replica(self):
+        self.sync_replica()
+        Note.objects.create(
+            title='Свежая заметка', text='Текст', author=self.author
+        )
+        content = self.author_client.get(NOTES_LIST_URL).content.decode()
+        self.assertIn('Старая заметка', content)
+        self.assertNotIn('Свежая заметка', content)
+        self.sync_replica()
+        self.assertContains(
+            self.author_client.get(NOTES_LIST_URL), 'Свежая заметка'
+        )
+
+    def test_author_reads_own_writes_after_post(self):
+        self.sync_replica()
+        response = self.author_client.post(
+            reverse('notes:add'), data={'title': 'Свежая заметка', 'text': 'Т'}
+        )
+        self.assertTrue(response.cookies[PIN_COOKIE].value)
+        self.assertTrue(Note.objects.filter(title='Свежая заметка').exists())
+        self.assertFalse(
+            Note.objects.using(REPLICA).filter(title='Свежая заметка').exists()
+        )
+        self.assertContains(
+            self.author_client.get(NOTES_LIST_URL), 'Свежая заметка'
+        )
+
+        del self.author_client.cookies[PIN_COOKIE]
+        self.assertNotContains(
+            self.author_client.get(NOTES_LIST_URL), 'Свежая заметка'
+        )
+
+    def test_request_reads_from_one_replica(self):
+        router = ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Note))
+        with override_settings(DATABASE_REPLICAS=['first', 'second']):
+            with read_from_replica():
+                self.assertEqual(
+                    len({router.db_for_read(Note) for _ in range(50)}), 1
+                )
@@ -0,0 +1,61 @@
+import importlib
+import os
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import mock
+
+from django.db.utils import ConnectionHandler
+from django.test import SimpleTestCase
+
+
+class TestDevSettings(SimpleTestCase):
+
+    def load(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            return importlib.reload(
+                importlib.import_module('yanote.settings.dev')
+            )
+
+    def test_debug_is_off_by_default(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_DEBUG', None)
+            self.assertFalse(self.load().DEBUG)
+        self.assertTrue(self.load(DJANGO_DEBUG='1').DEBUG)
+
+
+class TestAsgiEntryPoint(SimpleTestCase):
+
+    def test_async_views_stay_opt_in(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('ASYNC_VIEWS', None)
+            importlib.reload(importlib.import_module('yanote.asgi'))
+            self.assertNotIn('ASYNC_VIEWS', os.environ)
+
+
+class TestProdSettings(SimpleTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with mock.patch.dict(os.environ, {'DJANGO_SECRET_KEY': 'secret'}):
+            cls.prod = importlib.reload(
+                importlib.import_module('yanote.settings.prod')
+            )
+
+    def test_prod_settings(self):
+        self.assertFalse(self.prod.DEBUG)
+        self.assertGreater(self.prod.DATABASES['default']['CONN_MAX_AGE'], 0)
+        (loader, _), = self.prod.TEMPLATES[0]['OPTIONS']['loaders']
+        self.assertEqual(loader, 'django.template.loaders.cached.Loader')
+
+    def test_prod_database_pragmas(self):
+        with TemporaryDirectory() as directory:
+            connections = ConnectionHandler({'default': {
+                **self.prod.DATABASES['default'],
+                'NAME': Path(directory) / 'db.sqlite3',
+            }})
+            with connections['default'].cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                journal_mode = cursor.fetchone()[0]
+            connections.close_all()
+        self.assertEqual(journal_mode, 'wal')
@@ -1,9 +1,47 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.db import IntegrityError, transaction
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.views import generic
+from django.views.decorators.http import condition
 
-from .forms import NoteForm
+from .forms import WARNING, NoteForm
+from .jsonl import chunks, dump_notes, spool
 from .models import Note
+from .routers import ReplicaReadMixin
+from .search import search_notes
+
+
+def note_updated(request, slug):
+    """Время изменения заметки пользователя одним коротким запросом."""
+    if not hasattr(request, '_note_updated'):
+        request._note_updated = Note.objects.filter(
+            author=request.user, slug=slug
+        ).values_list('updated', flat=True).first()
+    return request._note_updated
+
+
+def note_last_modified(request, slug):
+    """
+    Дата HTTP точна до секунды: пока не прошла секунда после изменения,
+    Last-Modified не отдаём, иначе вторая правка в ту же секунду была бы
+    не видна по If-Modified-Since.
+    """
+    updated = note_updated(request, slug)
+    if updated is None or timezone.now() - updated < timedelta(seconds=1):
+        return None
+    return updated
+
+
+def note_etag(request, slug):
+    updated = note_updated(request, slug)
+    return updated and f'{slug}-{updated.timestamp()}'
 
 
 class Home(generic.TemplateView):
@@ -26,22 +64,33 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin(NoteBase):
+    """Сохранение формы заметки с проверкой slug на стороне БД."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Ошибкой формы становится только занятый slug."""
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            if not form.instance.slug_is_taken():
+                raise
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -49,11 +98,89 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+class NotesList(ReplicaReadMixin, NoteBase, generic.ListView):
+    """Список заметок пользователя страницами по id."""
     template_name = 'notes/list.html'
 
+    def get_after(self):
+        try:
+            return int(self.request.GET.get('after', 0))
+        except ValueError:
+            raise Http404('Неверный курсор.')
 
-class NoteDetail(NoteBase, generic.DetailView):
+    def get_queryset(self):
+        """
+        Страница из NOTES_PAGE_SIZE заметок с id больше after.
+
+        Сначала по индексу читаются id на одну заметку больше страницы:
+        лишний id только показывает, что есть следующая страница. Сами
+        заметки читаются одним запросом и только с нужными шаблону полями.
+        """
+        size = settings.NOTES_PAGE_SIZE
+        notes = super().get_queryset()
+        ids = list(notes.filter(pk__gt=self.get_after()).order_by(
+            'pk'
+        ).values_list('pk', flat=True)[:size + 1])
+        self.next_after = ids[size - 1] if len(ids) > size else None
+        return notes.filter(pk__in=ids[:size]).order_by('pk').only(
+            'id', 'slug', 'title'
+        )
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_after'] = self.next_after
+        return context
+
+
+class NotesSearch(LoginRequiredMixin, generic.TemplateView):
+    """Поиск по заголовкам и текстам заметок пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '')
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            raise Http404('Неверный номер страницы.')
+        if page < 1:
+            raise Http404('Неверный номер страницы.')
+        notes, has_next = search_notes(
+            self.request.user, query, page, settings.NOTES_SEARCH_PAGE_SIZE
+        )
+        context.update(
+            query=query, page=page, object_list=notes, has_next=has_next
+        )
+        return context
+
+
+@method_decorator(
+    condition(etag_func=note_etag, last_modified_func=note_last_modified),
+    name='get'
+)
+class NoteDetail(ReplicaReadMixin, NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class NotesExport(NoteBase, generic.View):
+    """Выгрузка всех заметок пользователя потоком в JSON Lines."""
+
+    def get(self, request, *args, **kwargs):
+        """
+        Под ASGI Django 3.2 перебирает потоковый ответ прямо в цикле
+        событий, где ORM недоступен, поэтому там заметки ещё в потоке
+        представления пишутся во временный файл, а отдаётся уже он.
+        """
+        content_type = 'application/x-ndjson; charset=utf-8'
+        lines = dump_notes(self.get_queryset())
+        if isinstance(request, ASGIRequest):
+            return FileResponse(
+                spool(lines), as_attachment=True, filename='notes.jsonl',
+                content_type=content_type
+            )
+        response = StreamingHttpResponse(
+            chunks(lines), content_type=content_type
+        )
+        response['Content-Disposition'] = 'attachment; filename="notes.jsonl"'
+        return response
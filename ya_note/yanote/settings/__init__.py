@@ -0,0 +1,20 @@
+"""
+Настройки YaNote по слоям: base - общие, dev - для разработки, prod -
+для боевого сервера. Слой выбирает переменная окружения DJANGO_ENV
+(dev по умолчанию), поэтому DJANGO_SETTINGS_MODULE всегда
+yanote.settings.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+DJANGO_ENV = os.getenv('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401,F403
+elif DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401,F403
+else:
+    raise ImproperlyConfigured(
+        f'DJANGO_ENV должна быть dev или prod, а не {DJANGO_ENV!r}.'
+    )
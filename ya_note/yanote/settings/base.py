@@ -0,0 +1,154 @@
+"""
+Общие настройки YaNote; dev.py и prod.py дополняют их, а выбирает
+между ними settings/__init__.py.
+"""
+import os
+from pathlib import Path
+
+from django.urls import reverse_lazy
+
+BASE_DIR = Path(__file__).resolve().parent.parent.parent
+
+SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
+
+DEBUG = False
+
+ALLOWED_HOSTS = ['*']
+
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'notes.apps.NotesConfig'
+]
+
+MIDDLEWARE = [
+    'notes.profiling.SqlProfilingMiddleware',
+    'notes.routers.ReplicaPinMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yanote.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [BASE_DIR / 'templates'],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yanote.wsgi.application'
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+    }
+}
+
+# Реплики только для чтения, см. notes.routers: пути к файлам SQLite
+# через запятую в DATABASE_REPLICAS, алиасы replica1, replica2 и т. д.
+DATABASE_REPLICAS = []
+for index, name in enumerate(
+        filter(None, os.getenv('DATABASE_REPLICAS', '').split(',')), start=1
+):
+    DATABASES[f'replica{index}'] = {**DATABASES['default'], 'NAME': name}
+    DATABASE_REPLICAS.append(f'replica{index}')
+
+DATABASE_ROUTERS = ['notes.routers.ReplicaRouter']
+
+# Сколько секунд после изменяющего запроса клиент читает из основной
+# базы.
+REPLICA_PIN_SECONDS = 5
+
+# Сессия по умолчанию хранится в подписанной cookie и не читается из
+# базы. Её нельзя отозвать на сервере до истечения срока; если это
+# нужно, подойдёт django.contrib.sessions.backends.cached_db.
+SESSION_ENGINE = os.getenv(
+    'SESSION_ENGINE', 'django.contrib.sessions.backends.signed_cookies'
+)
+
+# Пользователь сессии берётся из кеша USER_CACHE_ALIAS, см. notes.auth.
+# Для нескольких процессов USER_CACHE_BACKEND должен быть общим, иначе
+# смену пароля в одном процессе другие заметят только через TIMEOUT;
+# prod.py по умолчанию берёт файловый кеш в USER_CACHE_LOCATION.
+AUTHENTICATION_BACKENDS = ['notes.auth.CachedModelBackend']
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'users': {
+        'BACKEND': os.getenv(
+            'USER_CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('USER_CACHE_LOCATION', 'yanote-users'),
+        'TIMEOUT': 60,
+    },
+}
+
+USER_CACHE_ALIAS = 'users'
+
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'Europe/Moscow'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+STATIC_URL = '/static/'
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+LOGIN_URL = reverse_lazy('users:login')
+LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PAGE_SIZE = 100
+
+NOTES_SEARCH_PAGE_SIZE = 20
+
+# Асинхронные варианты страниц для ASGI-сервера, включаются ASYNC_VIEWS=1.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS') == '1'
+
+# Профилирование SQL, см. notes.profiling: доля профилируемых запросов
+# (0 - выключено), порог медленного запроса и журнал медленных запросов.
+SQL_PROFILING_RATE = float(os.getenv('SQL_PROFILING_RATE', 0))
+SQL_PROFILING_SLOW_MS = 500
+SQL_PROFILING_LOG = BASE_DIR / 'slow_requests.jsonl'
+SQL_PROFILING_LOG_BYTES = 10 * 1024 * 1024
@@ -0,0 +1,11 @@
+"""
+Настройки для разработки.
+
+DEBUG, как и до разделения настроек, по умолчанию выключен: его
+включает DJANGO_DEBUG=1.
+"""
+import os
+
+from .base import *  # noqa: F401,F403
+
+DEBUG = os.getenv('DJANGO_DEBUG') == '1'